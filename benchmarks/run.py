@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""
+Run the rendering benchmarks, recording events per second and peak
+memory for each workload as JSON and optionally comparing against a
+stored baseline.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.workloads import workloads
+
+
+def measure(workload, repeat):
+    random.seed(0)
+    run = workload()
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Measure memory in a separate run since tracing slows things down.
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "events": events,
+        "events_per_sec": events / best,
+        "peak_bytes": peak,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    "Yield descriptions of the results that are worse than baseline."
+    for name, r in results.items():
+        if (b := baseline.get(name)) is None:
+            continue
+        if r["events_per_sec"] < b["events_per_sec"] * (1 - tolerance):
+            yield f"{name}: {r['events_per_sec']:,.0f} events/sec (was {b['events_per_sec']:,.0f})"
+        if r["peak_bytes"] > b["peak_bytes"] * (1 + tolerance):
+            yield f"{name}: {r['peak_bytes']:,} bytes peak (was {b['peak_bytes']:,})"
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed fractional slowdown."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per workload.")
+    parser.add_argument("--large", action="store_true", help="Include 1M note runs.")
+    parser.add_argument("workloads", nargs="*", help="Workloads to run (default all).")
+
+    args = parser.parse_args()
+
+    available = workloads(args.large)
+    names = args.workloads or list(available)
+
+    results = {}
+    for name in names:
+        results[name] = r = measure(available[name], args.repeat)
+        print(
+            f"{name:20} {r['events_per_sec']:14,.0f} events/sec {r['peak_bytes']:14,} bytes peak"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if problems := list(regressions(results, baseline, args.tolerance)):
+            print("\nRegressions:")
+            for p in problems:
+                print(f"  {p}")
+            sys.exit(1)
@@ -0,0 +1,96 @@
+"""
+Workloads for benchmarking the rendering engine in eartraining.midi.
+
+Each workload is a function that builds its input and returns a
+function that does the work being measured and returns how many
+events it produced.
+"""
+
+import random
+
+from eartraining.midi import NoteArray
+from eartraining.midi import Parallel
+from eartraining.midi import Rest
+from eartraining.midi import Sequence
+from eartraining.music import melody
+from eartraining.quizes.progressions import random_voicing
+from rowrow import make_melody
+
+
+def rowrow_round():
+    m = make_melody()
+    round = (
+        m.transpose(12)
+        | (Rest(1) + m)
+        | (Rest(2) + m.transpose(-12))
+        | (Rest(3) + m.transpose(-24))
+    )
+    return lambda: len(round.render(60, 120))
+
+
+def long_sequence(n):
+    def workload():
+        m = melody([random.randrange(24) for _ in range(n)])
+        return lambda: len(m.render(60, 120))
+
+    return workload
+
+
+def nested(depth):
+    def workload():
+        p = melody([0, 4, 7])
+        for i in range(depth):
+            p = Sequence([p, melody([i % 12])]) if i % 2 else Parallel([p, melody([7])])
+        return lambda: len(p.render(60, 120))
+
+    return workload
+
+
+def chords(n):
+    def workload():
+        triads = [(0, 4, 7), (0, 3, 7), (0, 3, 6), (0, 4, 8)]
+        p = Sequence([random_voicing(random.choice(triads)) for _ in range(n)])
+        return lambda: len(p.render(60, 120))
+
+    return workload
+
+
+def rhythm(n):
+    def workload():
+        m = melody([random.randrange(24) for _ in range(n)])
+        return lambda: len(m.rhythm((1 / 8, 1 / 16, 1 / 16)).children) * 2
+
+    return workload
+
+
+def transpose(n):
+    def workload():
+        m = melody([random.randrange(24) for _ in range(n)])
+        return lambda: len(m.transpose(7).children) * 2
+
+    return workload
+
+
+def note_array(n):
+    def workload():
+        m = NoteArray.of([random.randrange(24) for _ in range(n)])
+        return lambda: len(
+            m.rhythm((1 / 8, 1 / 16, 1 / 16)).transpose(7).render(60, 120)
+        )
+
+    return workload
+
+
+def workloads(large=False):
+    "Name to workload. The million note workloads take a while so are optional."
+    sizes = (10_000, 100_000, 1_000_000) if large else (10_000, 100_000)
+    w = {"rowrow": rowrow_round}
+    for n in sizes:
+        w[f"sequence-{n}"] = long_sequence(n)
+    w["nested-1000"] = nested(1000)
+    w["chords-10000"] = chords(10_000)
+    for n in sizes:
+        w[f"rhythm-{n}"] = rhythm(n)
+        w[f"transpose-{n}"] = transpose(n)
+        w[f"note-array-{n}"] = note_array(n)
+    return w
@@ -7,17 +7,20 @@ Customize by providing an implementation of Quiz.
 """
 
 import random
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 
 import pygame
 import pygame.freetype
-import pygame.midi
 import pygame.time
 
-from eartraining.midi import play
+from eartraining import timing
+from eartraining.backends import open_output
 from eartraining.music import Scale
 from eartraining.music import melody
+from eartraining.playback import Player
+from eartraining.progress import open_progress
 from eartraining.ui import Button
 from eartraining.ui import Buttons
 from eartraining.ui import ButtonState
@@ -35,14 +38,14 @@ establish_key = (
 
 
 class Question:
-    def play(self, midi_out):
+    def play(self, player):
         "Play the question."
 
-    def hint(self, midi_out):
+    def hint(self, player):
         "Play a hint for the question. By default is just the question again."
-        self.play(midi_out)
+        self.play(player)
 
-    def after_correct(self, midi_out):
+    def after_correct(self, player):
         "Some quizes want to play something after a correct answer."
 
 
@@ -61,7 +64,20 @@ class Clock:
         return pygame.time.get_ticks() - self.start_tick
 
 
+@dataclass
+class LoggedChoice:
+
+    "Stands in for a question or choice when replaying logged answers."
+
+    idx: int
+
+
 class Quiz:
+
+    # Where answers are logged, if the quiz can be saved. See
+    # eartraining.progress.
+    progress = None
+
     def __init__(self):
         self.current_question = Question()  # Dummy question
 
@@ -89,10 +105,32 @@ class Quiz:
     def status_text(self):
         return ""
 
+    def replay(self, answers):
+        """
+        Update for logged (question, choice) pairs of idxs, in order,
+        starting with the first answer to a question. A right answer
+        always moves on to a new question so the next answer is a first
+        answer too.
+        """
+        self.first_answer = True
+        for question, chosen in answers:
+            if self.first_answer:
+                self.count_asked(question)
+            self.update(LoggedChoice(chosen), LoggedChoice(question))
+            self.first_answer = question == chosen
+
+    def count_asked(self, idx):
+        "Count the question with idx as asked, when replaying answers."
+
+    def labels(self):
+        "The labels of the questions, by idx. By default from the templates."
+        return [t.label for t in self.templates]
+
     def next_question(self):
         choices = self.make_choices()
         question, questions = self.make_questions(choices)
         self.current_question = question
+        self.asked_at = time.monotonic()
         pygame.event.post(
             pygame.event.Event(
                 QuizUI.NEW_QUESTION, question=question, questions=questions
@@ -102,6 +140,11 @@ class Quiz:
     def check_answer(self, choice):
         self.update(choice, self.current_question)
 
+        if self.progress is not None:
+            self.progress.record(
+                self.current_question.idx, choice.idx, time.monotonic() - self.asked_at
+            )
+
         if choice is self.current_question:
             pygame.event.post(
                 pygame.event.Event(QuizUI.CORRECT_ANSWER, question=choice)
@@ -125,15 +168,22 @@ class QuizUI:
     CORRECT_ANSWER = pygame.event.custom_type()
     WRONG_ANSWER = pygame.event.custom_type()
 
+    # Output latency in ms. When non-zero PortMidi does the timing of
+    # the timestamped events we write to it.
+    midi_latency = 0
+
     def __init__(self, name, quiz):
         pygame.init()
         pygame.display.set_caption(name)
         pygame.event.set_blocked(pygame.MOUSEMOTION)
         pygame.event.pump()
 
+        self.name = name
         self.quiz = quiz
         self.listeners = defaultdict(list)
         self.running = False
+        self.backend = None
+        self.player = None
 
         self.size = (300, 500)
         self.screen = pygame.display.set_mode(self.size)
@@ -183,35 +233,38 @@ class QuizUI:
             self.running = False
 
         elif is_replay(event):
-            self.quiz.current_question.play(self.midi_out)
+            self.quiz.current_question.play(self.player)
 
         elif is_replay_with_hint(event):
-            self.quiz.current_question.hint(self.midi_out)
+            self.quiz.current_question.hint(self.player)
 
         elif is_establish_key(event):
-            play(self.midi_out, establish_key)
+            self.player.play(establish_key)
 
         elif event.type == QuizUI.NEW_QUESTION:
             self.buttons.set_questions(event.questions, event.questions)
             self.draw()
-            event.question.play(self.midi_out)
+            # Let anything played after the last correct answer finish.
+            with self.player.queueing():
+                event.question.play(self.player)
 
         elif event.type == QuizUI.CORRECT_ANSWER:
+            self.player.cancel()
             self.play_and_wait(self.correct_sound)
             self.draw()
-            event.question.after_correct(self.midi_out)
+            event.question.after_correct(self.player)
 
         elif event.type == QuizUI.WRONG_ANSWER:
             self.play_and_wait(self.wrong_sound)
             self.draw()
-            event.question.play(self.midi_out)
+            event.question.play(self.player)
 
         elif event.type == Button.BUTTON_PRESSED:
             # FIXME: this should probably live in the Button itself.
             if event.button.state is ButtonState.WRONG:
                 # We get here when the button has already been marked
                 # wrong previously.
-                event.button.question.play(self.midi_out)
+                event.button.question.play(self.player)
             else:
                 if not self.quiz.check_answer(event.button.question):
                     event.button.state = ButtonState.WRONG
@@ -229,6 +282,7 @@ class QuizUI:
         try:
             self.setup_sound_effects()
             self.open_midi_out()
+            self.quiz.progress = open_progress(self.name, self.quiz)
             self.clock.start()
             self.quiz.next_question()
 
@@ -238,7 +292,13 @@ class QuizUI:
 
         finally:
             print(f"Time: {self.status.time_label(self.clock.elapsed())}")
-            pygame.midi.quit()
+            print(timing.jitter.summary())
+            if self.quiz.progress is not None:
+                self.quiz.progress.close()
+            if self.player is not None:
+                self.player.close()
+            if self.backend is not None:
+                self.backend.close()
 
     def setup_sound_effects(self):
         pygame.mixer.init()
@@ -264,7 +324,6 @@ class QuizUI:
                 break
 
     def open_midi_out(self):
-        pygame.midi.init()
-        port = pygame.midi.get_default_output_id()
-        self.midi_out = pygame.midi.Output(port, 0)
+        self.backend, self.midi_out = open_output(self.midi_latency)
         self.midi_out.set_instrument(0)
+        self.player = Player(self.midi_out, latency=self.midi_latency)
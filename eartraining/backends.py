@@ -0,0 +1,203 @@
+"""
+Where MIDI goes. A Backend opens an output that looks like a
+pygame.midi.Output (note_on, note_off, write, set_instrument) and
+cleans up after it when closed.
+
+- portmidi: the default MIDI device via pygame.midi.
+- null: throws everything away at no cost.
+- record: records every message with its time in an array.
+- loopback: a virtual port whose messages can be read back from an
+  input that looks like a pygame.midi.Input.
+
+The backend used by the apps is picked with the EARTRAINING_MIDI
+environment variable, defaulting to portmidi. If there is no MIDI
+device we fall back to the null backend so things still run.
+"""
+
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pygame.midi
+
+
+def midi_time():
+    """
+    Milliseconds on the PortMidi clock if it's running, otherwise on
+    our own clock. Timestamps written to outputs are on this clock.
+    """
+    if pygame.midi.get_init():
+        return pygame.midi.time()
+    return round(time.perf_counter() * 1000)
+
+
+class Output:
+
+    """
+    Base class for our own outputs. Everything goes through message()
+    which gets the raw MIDI bytes and a timestamp in milliseconds, or
+    None for right now.
+    """
+
+    def message(self, data, timestamp=None):
+        "Handle one MIDI message."
+
+    def note_on(self, note, velocity=None, channel=0):
+        self.message([0x90 | channel, note, velocity or 0])
+
+    def note_off(self, note, velocity=None, channel=0):
+        self.message([0x80 | channel, note, velocity or 0])
+
+    def set_instrument(self, instrument_id, channel=0):
+        self.message([0xC0 | channel, instrument_id, 0])
+
+    def write_short(self, status, data1=0, data2=0):
+        self.message([status, data1, data2])
+
+    def write(self, data):
+        for message, timestamp in data:
+            self.message(message, timestamp)
+
+    def close(self):
+        pass
+
+
+class NullOutput(Output):
+
+    "Output that throws everything away."
+
+    def note_on(self, note, velocity=None, channel=0):
+        pass
+
+    def note_off(self, note, velocity=None, channel=0):
+        pass
+
+
+message_dtype = np.dtype(
+    [("time", "f8"), ("status", "u1"), ("data1", "u1"), ("data2", "u1")]
+)
+
+
+class RecordingOutput(Output):
+
+    """
+    Output that records every message along with when it was sent, in
+    seconds since the output was opened, in a structured array. Messages
+    written with a timestamp are recorded at that time.
+    """
+
+    def __init__(self, capacity=1024):
+        self.records = np.zeros(capacity, dtype=message_dtype)
+        self.count = 0
+        self.t_zero = time.perf_counter()
+        self.ms_zero = midi_time()
+
+    def message(self, data, timestamp=None):
+        if self.count == len(self.records):
+            self.records = np.resize(self.records, 2 * len(self.records))
+        if timestamp is None:
+            t = time.perf_counter() - self.t_zero
+        else:
+            t = (timestamp - self.ms_zero) / 1000
+        self.records[self.count] = (t, *data[:3])
+        self.count += 1
+
+    def messages(self):
+        return self.records[: self.count]
+
+
+class LoopbackInput:
+
+    "The reading end of a LoopbackOutput, like a pygame.midi.Input."
+
+    def __init__(self):
+        self.pending = deque()
+
+    def poll(self):
+        return bool(self.pending)
+
+    def read(self, num_events):
+        n = min(num_events, len(self.pending))
+        return [self.pending.popleft() for _ in range(n)]
+
+    def close(self):
+        pass
+
+
+class LoopbackOutput(Output):
+
+    "Output whose messages show up on its input."
+
+    def __init__(self):
+        self.input = LoopbackInput()
+
+    def message(self, data, timestamp=None):
+        if timestamp is None:
+            timestamp = midi_time()
+        self.input.pending.append([[*data[:3], 0], timestamp])
+
+
+class Backend:
+    def open(self, latency=0):
+        "Open an output."
+
+    def close(self):
+        "Clean up after the output."
+
+
+class PortMidi(Backend):
+    def open(self, latency=0):
+        pygame.midi.init()
+        port = pygame.midi.get_default_output_id()
+        if port == -1:
+            pygame.midi.quit()
+            raise NoDevice()
+        return pygame.midi.Output(port, latency)
+
+    def close(self):
+        pygame.midi.quit()
+
+
+class Simple(Backend):
+
+    "Backend for one of our own output classes."
+
+    def __init__(self, output_class):
+        self.output_class = output_class
+        self.output = None
+
+    def open(self, latency=0):
+        self.output = self.output_class()
+        return self.output
+
+    def close(self):
+        if self.output is not None:
+            self.output.close()
+
+
+class NoDevice(Exception):
+    pass
+
+
+backends = {
+    "portmidi": PortMidi,
+    "null": lambda: Simple(NullOutput),
+    "record": lambda: Simple(RecordingOutput),
+    "loopback": lambda: Simple(LoopbackOutput),
+}
+
+
+def open_output(latency=0, name=None):
+    """
+    Open an output with the named backend, or the one named by the
+    EARTRAINING_MIDI environment variable. Returns the backend, which
+    should be closed when we're done with it, and the output.
+    """
+    name = name or os.environ.get("EARTRAINING_MIDI", "portmidi")
+    backend = backends[name]()
+    try:
+        return backend, backend.open(latency)
+    except NoDevice:
+        print("No MIDI output device. Using the null backend.")
+        return open_output(latency, "null")
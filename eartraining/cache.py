@@ -0,0 +1,96 @@
+"""
+Cache of rendered Playables.
+
+Rendering the same Playable at a different root or tempo only adds a
+constant to the notes and maps the ticks to different times. So we
+cache one render of each shape at root 0 with its times in ticks and
+derive the others from it.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import fields
+
+import numpy as np
+
+from eartraining.midi import EventArray
+from eartraining.midi import Playable
+from eartraining.midi import flatten
+from eartraining.rope import Rope
+from eartraining.tempo import TempoMap
+
+
+def shape(playable):
+    """
+    A hashable description of the structure of a Playable. Two
+    Playables with the same shape render to the same events.
+
+    It's a flat tuple of the nodes and their fields in order, with
+    lists marked by their length, built with our own stack like
+    flatten. A nested tuple would hit the recursion limit on deep trees
+    when building it and again when comparing keys.
+    """
+    key = []
+    stack = [playable]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, Playable):
+            key.append(type(x))
+            stack.extend(getattr(x, f.name) for f in reversed(fields(x)))
+        elif isinstance(x, (list, tuple, Rope)):
+            key.append((list, len(x)))
+            stack.extend(reversed(list(x)))
+        elif isinstance(x, np.ndarray):
+            key.append((x.dtype.str, x.shape, x.tobytes()))
+        else:
+            key.append(x)
+    return tuple(key)
+
+
+@dataclass
+class CacheStats:
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class RenderCache:
+
+    "Least recently used cache of canonical renders."
+
+    def __init__(self, size=128):
+        self.size = size
+        self.renders = OrderedDict()
+        self.stats = CacheStats()
+
+    def render(self, playable, root, bpm):
+        "Render the Playable as Playable.render would."
+        key = shape(playable)
+        canonical = self.renders.get(key)
+        if canonical is None:
+            self.stats.misses += 1
+            canonical = flatten(playable).render_ticks(0)
+            self.renders[key] = canonical
+            if len(self.renders) > self.size:
+                self.renders.popitem(last=False)
+                self.stats.evictions += 1
+        else:
+            self.stats.hits += 1
+            self.renders.move_to_end(key)
+
+        data = canonical.data.copy()
+        data["note"] += root
+        data["time"] = TempoMap.of(bpm).seconds(data["time"])
+        return EventArray(data)
+
+    def clear(self):
+        self.renders.clear()
+
+
+renders = RenderCache()
+
+
+def render(playable, root, bpm):
+    "Render a Playable using the shared cache."
+    return renders.render(playable, root, bpm)
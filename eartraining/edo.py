@@ -0,0 +1,85 @@
+"""
+Playing music in equal temperaments other than 12-EDO.
+
+In an N-EDO the octave is divided into N equal steps. Playables whose
+pitches are in steps of an N-EDO, such as notes from a Scale with
+edo=N, are rendered as usual with a root of 0 and then each step is
+mapped to the nearest MIDI note plus a pitch bend to make up the
+difference.
+
+Pitch bend applies to a whole channel so notes that need different
+bends at the same time have to go on different channels. We hand out
+channels as notes start, reusing a channel that is already bent the
+right way if we can and otherwise any channel that is free.
+"""
+
+import numpy as np
+
+from eartraining.midi import OFF
+from eartraining.midi import NoteOff
+from eartraining.midi import NoteOn
+from eartraining.midi import PitchBend
+from eartraining.midi import voice_channels
+
+# Pitch bend range of the synth in semitones either way. Two is the
+# General MIDI default.
+bend_range = 2
+
+no_bend = 8192
+
+
+def thirds(edo):
+    "The steps closest to a just minor and major third in an N-EDO."
+    return (round(edo * np.log2(6 / 5)), round(edo * np.log2(5 / 4)))
+
+
+def midi_pitches(steps, edo, root=60):
+    """
+    The MIDI notes and pitch bend values for an array of pitches in
+    steps of an N-EDO above the MIDI note root.
+    """
+    semitones = root + np.asarray(steps) * (12 / edo)
+    notes = np.rint(semitones).astype("i2")
+    bends = no_bend + np.rint((semitones - notes) * (no_bend / bend_range))
+    return notes, np.minimum(bends, 16383).astype("i4")
+
+
+def render(playable, edo, root, bpm, channels=voice_channels):
+    """
+    Render a Playable with pitches in steps of an N-EDO to a sorted
+    list of NoteOn, NoteOff, and PitchBend events, with root the MIDI
+    note of step 0. Raises ValueError if more different bends are
+    needed at once than there are channels.
+    """
+    data = playable.render(0, bpm).data
+    notes, bends = midi_pitches(data["note"], edo, root)
+
+    bent = {c: None for c in channels}
+    sounding = {c: set() for c in channels}
+    playing = {}
+    events = []
+    for (time, kind, step, velocity, channel), note, bend in zip(
+        data.tolist(), notes.tolist(), bends.tolist()
+    ):
+        key = (channel, step)
+        if kind == OFF:
+            c = playing.pop(key)
+            sounding[c].discard(note)
+            events.append(NoteOff(note, time, c))
+            continue
+
+        c = next(
+            (c for c in channels if bent[c] == bend and note not in sounding[c]),
+            None,
+        )
+        if c is None:
+            c = next((c for c in channels if not sounding[c]), None)
+        if c is None:
+            raise ValueError("Not enough channels for all the pitch bends.")
+        if bent[c] != bend:
+            events.append(PitchBend(bend, time, c))
+            bent[c] = bend
+        sounding[c].add(note)
+        playing[key] = c
+        events.append(NoteOn(note, velocity, time, c))
+    return events
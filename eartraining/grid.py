@@ -13,12 +13,13 @@ from typing import List
 
 import pygame
 import pygame.freetype
-import pygame.midi
 import pygame.time
 
-from eartraining.midi import play
+from eartraining import timing
+from eartraining.backends import open_output
 from eartraining.music import Scale
 from eartraining.music import melody
+from eartraining.playback import Player
 from eartraining.ui import Button
 from eartraining.ui import ButtonState
 from eartraining.ui import Grid
@@ -36,12 +37,12 @@ establish_key = (
 
 
 class Question:
-    def play(self, midi_out, root):
+    def play(self, player, root):
         "Play the question."
 
-    def hint(self, midi_out, root):
+    def hint(self, player, root):
         "Play a hint for the question. By default is just the question again."
-        self.play(midi_out, root)
+        self.play(player, root)
 
 
 @dataclass
@@ -125,6 +126,10 @@ class QuizUI:
     CORRECT_ANSWER = pygame.event.custom_type()
     WRONG_ANSWER = pygame.event.custom_type()
 
+    # Output latency in ms. When non-zero PortMidi does the timing of
+    # the timestamped events we write to it.
+    midi_latency = 0
+
     def __init__(self, name, quiz):
         pygame.init()
         pygame.display.set_caption(name)
@@ -134,6 +139,8 @@ class QuizUI:
         self.quiz = quiz
         self.listeners = defaultdict(list)
         self.running = False
+        self.backend = None
+        self.player = None
 
         r, c = quiz.dimensions()
 
@@ -192,33 +199,34 @@ class QuizUI:
             self.running = False
 
         elif is_replay(event):
-            self.quiz.current_question.play(self.midi_out, self.quiz.root)
+            self.quiz.current_question.play(self.player, self.quiz.root)
 
         elif is_replay_with_hint(event):
-            self.quiz.current_question.hint(self.midi_out)
+            self.quiz.current_question.hint(self.player, self.quiz.root)
 
         elif is_establish_key(event):
-            play(self.midi_out, establish_key)
+            self.player.play(establish_key)
 
         elif event.type == QuizUI.NEW_QUESTION:
             self.draw()
-            event.question.play(self.midi_out, self.quiz.root)
+            event.question.play(self.player, self.quiz.root)
 
         elif event.type == QuizUI.CORRECT_ANSWER:
+            self.player.cancel()
             self.play_and_wait(self.correct_sound)
             self.draw()
 
         elif event.type == QuizUI.WRONG_ANSWER:
             self.play_and_wait(self.wrong_sound)
             self.draw()
-            event.question.play(self.midi_out, self.quiz.root)
+            event.question.play(self.player, self.quiz.root)
 
         elif event.type == Button.BUTTON_PRESSED:
             # FIXME: this should probably live in the Button itself.
             if event.button.state is ButtonState.WRONG:
                 # We get here when the button has already been marked
                 # wrong previously.
-                event.button.question.play(self.midi_out, self.quiz.root)
+                event.button.question.play(self.player, self.quiz.root)
             else:
                 if self.quiz.check_answer(event.button.question):
                     for b in self.grid.buttons:
@@ -248,7 +256,11 @@ class QuizUI:
 
         finally:
             print(f"Time: {self.status.time_label(self.clock.elapsed())}")
-            pygame.midi.quit()
+            print(timing.jitter.summary())
+            if self.player is not None:
+                self.player.close()
+            if self.backend is not None:
+                self.backend.close()
 
     def setup_sound_effects(self):
         pygame.mixer.init()
@@ -274,7 +286,6 @@ class QuizUI:
                 break
 
     def open_midi_out(self):
-        pygame.midi.init()
-        port = pygame.midi.get_default_output_id()
-        self.midi_out = pygame.midi.Output(port, 0)
+        self.backend, self.midi_out = open_output(self.midi_latency)
         self.midi_out.set_instrument(0)
+        self.player = Player(self.midi_out, latency=self.midi_latency)
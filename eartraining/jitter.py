@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+"""
+Measure how accurately we can play events by playing a calibration
+pattern into an output that discards everything and reporting how
+late the events were.
+"""
+
+import argparse
+
+from eartraining import timing
+from eartraining.backends import NullOutput
+from eartraining.music import melody
+
+
+def calibration_pattern(notes, duration, bpm):
+    return melody([i % 12 for i in range(notes)]).rhythm(duration).render(60, bpm)
+
+
+def histogram_lines(log, bins=10, width=50):
+    "Text histogram of the lateness, in microseconds, of the logged events."
+    counts, edges = log.histogram(bins)
+    edges = edges * 1_000_000
+    biggest = max(counts.max(), 1)
+    for count, low, high in zip(counts, edges, edges[1:]):
+        bar = "#" * round(width * count / biggest)
+        yield f"{low:9.1f} - {high:9.1f} µs {count:6} {bar}"
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=256, help="Notes to play.")
+    parser.add_argument("--bpm", type=float, default=240, help="Tempo.")
+    parser.add_argument(
+        "--duration", type=float, default=1 / 32, help="Length of each note."
+    )
+    parser.add_argument("--priority", type=int, help="SCHED_FIFO priority to ask for.")
+    parser.add_argument("--bins", type=int, default=10, help="Histogram bins.")
+
+    args = parser.parse_args()
+
+    timing.jitter.clear()
+    pattern = calibration_pattern(args.notes, args.duration, args.bpm)
+    timing.play(NullOutput(), pattern, priority=args.priority)
+
+    print(timing.jitter.summary())
+    for line in histogram_lines(timing.jitter, args.bins):
+        print(line)
@@ -4,8 +4,8 @@ import random
 
 import pygame
 import pygame.freetype
-import pygame.midi
 
+from eartraining.backends import open_output
 from eartraining.midi import play
 from eartraining.music import Note
 from eartraining.music import Scale
@@ -132,6 +132,7 @@ class UI:
         font = pygame.freetype.SysFont("helveticaneue", 32)
 
         self.running = False
+        self.backend = None
         self.screen = pygame.display.set_mode(self.size)
         self.keyboard = keyboard_class(
             quiz.labels, pygame.Rect(kb_pos, kb_size), font, gap
@@ -181,7 +182,8 @@ class UI:
                 self.dispatch_events()
 
         finally:
-            pygame.midi.quit()
+            if self.backend is not None:
+                self.backend.close()
 
     def fire_next_question(self):
         pygame.event.post(pygame.event.Event(UI.NEXT_QUESTION))
@@ -193,9 +195,7 @@ class UI:
         pygame.event.post(pygame.event.Event(UI.KEY_RELEASED, key=key))
 
     def open_midi_out(self):
-        pygame.midi.init()
-        port = pygame.midi.get_default_output_id()
-        self.midi_out = pygame.midi.Output(port, 0)
+        self.backend, self.midi_out = open_output()
         self.midi_out.set_instrument(0)
 
 
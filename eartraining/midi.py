@@ -3,35 +3,65 @@ Abstracted representation of notes, chords, and rests and
 functions for rendering them into note on/note off events.
 
 Notes, chords, and rests have only a duration, expressed in terms of
-(possibly fractional) quarter notes but can be arranged in a list
+(possibly fractional) whole notes but can be arranged in a list
 which can then be rendered as a sorted list of note on and note off
 events.
 
+Rendering lays the notes out on the integer tick timeline from
+eartraining.tempo and then converts ticks to seconds with a TempoMap,
+so the tempo can change as the piece goes on.
+
 Multiple sequences can be combined in parallel to allow overlapping
 notes.
+
+Rendered events are kept in an EventArray, a NumPy structured array
+of (time, kind, note, velocity, channel) records, which can be
+iterated over to get NoteOn and NoteOff objects.
+
+Notes are played on MIDI channel 0 unless moved to another channel
+with on_channel(). Overlapping notes are merged separately on each
+channel so independent voices can be put on their own channels to
+keep them from swallowing each other's notes.
 """
 
-import time
+import heapq
 from collections import Counter
 from dataclasses import dataclass
+from dataclasses import field
 from dataclasses import replace
+from itertools import count
 from itertools import cycle
+from itertools import islice
+from typing import Iterator
 from typing import List
+from typing import Optional
+
+import numpy as np
 
+from eartraining import timing
+from eartraining.rope import Rope
+from eartraining.tempo import TempoMap
+from eartraining.tempo import ticks
+from eartraining.tempo import whole_note
 
-def play(midi_out, events):
 
-    "Play a sorted series of NoteOn/NoteOff events."
+def play(midi_out, events, priority=None, programs=None, emissions=False):
+
+    """
+    Play a sorted series of NoteOn/NoteOff events, first setting the
+    instrument for each channel in programs, a dict from channel to
+    MIDI program. If emissions is true, returns the requested and
+    achieved emission time of each event. See eartraining.timing for
+    the details.
+    """
 
-    t_zero = time.monotonic()
+    set_programs(midi_out, programs or {})
+    return timing.play(midi_out, events, priority=priority, emissions=emissions)
 
-    for e in events:
-        # TODO: check accuracy of sleep timing
-        t = time.monotonic()
-        at = t_zero + e.time
-        if at > t:
-            time.sleep(at - t)
-        e.emit(midi_out)
+
+def set_programs(midi_out, programs):
+    for channel, program in programs.items():
+        midi_out.set_instrument(program, channel)
 
 
 @dataclass
@@ -45,9 +75,13 @@ class NoteOn:
     note: int
     velocity: int
     time: float
+    channel: int = 0
 
     def emit(self, midi_out):
-        midi_out.note_on(self.note, self.velocity)
+        midi_out.note_on(self.note, self.velocity, self.channel)
+
+    def message(self):
+        return [0x90 | self.channel, self.note, self.velocity]
 
 
 @dataclass
@@ -60,9 +94,112 @@ class NoteOff:
 
     note: int
     time: float
+    channel: int = 0
+
+    def emit(self, midi_out):
+        midi_out.note_off(self.note, 0, self.channel)
+
+    def message(self):
+        return [0x80 | self.channel, self.note, 0]
+
+
+@dataclass
+class PitchBend:
+    """
+    A MIDI pitch bend event. value is 14 bits with 8192 meaning no
+    bend.
+    """
+
+    value: int
+    time: float
+    channel: int = 0
 
     def emit(self, midi_out):
-        midi_out.note_off(self.note)
+        midi_out.write_short(*self.message())
+
+    def message(self):
+        return [0xE0 | self.channel, self.value & 0x7F, self.value >> 7]
+
+
+# Values of the kind field in an EventArray. Note offs sort before
+# note ons at the same time.
+OFF = 0
+ON = 1
+
+event_dtype = np.dtype(
+    [
+        ("time", "f8"),
+        ("kind", "u1"),
+        ("note", "i2"),
+        ("velocity", "u1"),
+        ("channel", "u1"),
+    ]
+)
+
+
+class EventArray:
+
+    """
+    A series of note on and note off events packed into a structured
+    array. Iterating over it yields NoteOn and NoteOff events so it can
+    be played like a list of events.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_events(cls, events):
+        "Pack NoteOn and NoteOff events, skipping anything else."
+        records = []
+        for e in events:
+            if isinstance(e, NoteOn):
+                records.append((e.time, ON, e.note, e.velocity, e.channel))
+            elif isinstance(e, NoteOff):
+                records.append((e.time, OFF, e.note, 0, e.channel))
+        return cls(np.array(records, dtype=event_dtype))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for time, kind, note, velocity, channel in self.data.tolist():
+            if kind == ON:
+                yield NoteOn(note, velocity, time, channel)
+            else:
+                yield NoteOff(note, time, channel)
+
+    def sorted(self):
+        "Sort by time with note offs before note ons and then by note and channel."
+        d = self.data
+        order = np.lexsort((d["channel"], d["note"], d["kind"], d["time"]))
+        return EventArray(d[order])
+
+    def without_overlaps(self):
+        """
+        Drop the note ons for notes that are already sounding and the
+        note offs that don't turn off the last sounding instance of a
+        note. Each channel is treated separately. Assumes the events are
+        sorted.
+        """
+        d = self.data
+        if len(d) == 0:
+            return self
+
+        keys = d["channel"].astype("i4") * 1024 + d["note"]
+        by_note = np.argsort(keys, kind="stable")
+        notes = keys[by_note]
+        delta = np.where(d["kind"][by_note] == ON, 1, -1)
+
+        # Running count of how many times each note is sounding.
+        count = np.cumsum(delta)
+        starts = np.flatnonzero(np.r_[True, notes[1:] != notes[:-1]])
+        sizes = np.diff(np.r_[starts, len(notes)])
+        count -= np.repeat(count[starts] - delta[starts], sizes)
+
+        keep = np.empty(len(d), dtype=bool)
+        keep[by_note] = np.where(delta == 1, count == 1, count == 0)
+        return EventArray(d[keep])
 
 
 @dataclass
@@ -70,7 +207,203 @@ class Time:
 
     "Fake event used to advance time in sequences to implement rests."
 
-    time: float
+    time: int
+
+
+def event_order(e):
+    "Events are ordered by time, then note offs before note ons, then note and channel."
+    return (
+        e.time,
+        isinstance(e, NoteOn),
+        getattr(e, "note", 0),
+        getattr(e, "channel", 0),
+    )
+
+
+@dataclass
+class Program:
+
+    """
+    A Playable flattened into a list of notes, kept as parallel lists
+    of onsets, durations, pitches, velocities, and channels. Onsets and
+    durations are in ticks and pitches are relative to the root.
+    """
+
+    onsets: List[int] = field(default_factory=list)
+    durations: List[int] = field(default_factory=list)
+    pitches: List[int] = field(default_factory=list)
+    velocities: List[int] = field(default_factory=list)
+    channels: List[int] = field(default_factory=list)
+
+    def add(self, onset, duration, pitch, velocity, channel):
+        self.onsets.append(onset)
+        self.durations.append(duration)
+        self.pitches.append(pitch)
+        self.velocities.append(velocity)
+        self.channels.append(channel)
+
+    def add_many(self, onsets, durations, pitches, velocities, channel):
+        self.onsets.extend(onsets.tolist())
+        self.durations.extend(durations.tolist())
+        self.pitches.extend(pitches.tolist())
+        self.velocities.extend(velocities.tolist())
+        self.channels.extend([channel] * len(onsets))
+
+    def render(self, root, tempo):
+        "Render to an EventArray with times in seconds given by a TempoMap."
+        events = self.render_ticks(root)
+        events.data["time"] = tempo.seconds(events.data["time"])
+        return events
+
+    def render_ticks(self, root):
+        "Render to an EventArray with times in ticks."
+        onsets = np.array(self.onsets, dtype="i8")
+        n = len(onsets)
+        times = np.concatenate((onsets, onsets + np.array(self.durations, dtype="i8")))
+        data = np.empty(2 * n, dtype=event_dtype)
+        data["kind"][:n] = ON
+        data["kind"][n:] = OFF
+        data["note"][:n] = data["note"][n:] = np.array(self.pitches) + root
+        data["velocity"][:n] = self.velocities
+        data["velocity"][n:] = 0
+        data["channel"][:n] = data["channel"][n:] = self.channels
+        order = np.lexsort((data["channel"], data["note"], data["kind"], times))
+        data = data[order]
+        data["time"] = times[order]
+        return EventArray(data).without_overlaps()
+
+
+@dataclass
+class Frame:
+
+    "Where we are in flattening or streaming a Sequence or Parallel."
+
+    children: Iterator
+    sequential: bool
+    start: int
+    t: int
+    end: Optional[int] = None
+    note_end: Optional[int] = None
+    # Only used when streaming: the enclosing frame and how many
+    # children have yet to be laid out.
+    parent: Optional["Frame"] = None
+    pending: int = 0
+
+    def child_start(self):
+        return self.t if self.sequential else self.start
+
+    def child_done(self, end, note_end):
+        if end is not None:
+            self.end = later(self.end, end)
+            if self.sequential:
+                self.t = max(self.t, end)
+        self.note_end = later(self.note_end, note_end)
+
+    def ends(self):
+        # Sequences swallow the time taken by rests so only their notes
+        # count toward when they end. Rests directly in a Parallel do
+        # count.
+        return (self.note_end if self.sequential else self.end), self.note_end
+
+
+def later(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def flatten(playable):
+    """
+    Flatten a Playable into a Program in one pass. We keep our own
+    stack rather than recursing so arbitrarily deep trees are fine.
+    Rests just move time forward and don't end up in the Program.
+
+    Each node ends up with two end times: when the last event it
+    produces happens, which is what moves the next child of a
+    Sequence, and when its last note ends. Both are None if it doesn't
+    produce anything.
+    """
+    program = Program()
+    stack = []
+    node, start = playable, 0
+
+    while True:
+        if isinstance(node, (Sequence, Parallel)):
+            sequential = isinstance(node, Sequence)
+            stack.append(Frame(iter(node.children), sequential, start, start))
+            ends = None
+        else:
+            ends = node.flatten_into(program, start)
+
+        while True:
+            if ends is not None:
+                if not stack:
+                    return program
+                stack[-1].child_done(*ends)
+
+            frame = stack[-1]
+            child = next(frame.children, None)
+            if child is not None:
+                node, start = child, frame.child_start()
+                break
+            stack.pop()
+            ends = frame.ends()
+
+
+def stream_events(playable, root):
+    """
+    Generate the events of a Playable in order with times in ticks and
+    overlapping notes left in. Like flatten we keep our own Frames
+    rather than recursing, but a child is only laid out once playback
+    reaches its start so this works for infinite Sequences. Waiting
+    children and events go in a heap, children ahead of events at the
+    same time.
+    """
+    heap = []
+    order = count()
+
+    def push(node, start, parent):
+        heapq.heappush(heap, ((start, -1, 0, 0, next(order)), node, parent))
+
+    push(playable, 0, None)
+    while heap:
+        key, item, frame = heapq.heappop(heap)
+        if not isinstance(item, Playable):
+            yield item
+            continue
+
+        start = key[0]
+        if isinstance(item, (Sequence, Parallel)):
+            children = iter(item.children)
+            sequential = isinstance(item, Sequence)
+            sub = Frame(children, sequential, start, start, parent=frame)
+            for child in islice(children, 1) if sequential else children:
+                push(child, start, sub)
+                sub.pending += 1
+            if sub.pending:
+                continue
+            ends = sub.ends()
+        else:
+            end = note_end = None
+            for e in item.midi(start, root):
+                end = later(end, e.time)
+                if not isinstance(e, Time):
+                    note_end = later(note_end, e.time)
+                    heapq.heappush(heap, (event_order(e) + (next(order),), e, None))
+            ends = end, note_end
+
+        # Let the enclosing frames know the child is laid out, starting
+        # the next child of a Sequence.
+        while frame is not None:
+            frame.child_done(*ends)
+            frame.pending -= 1
+            if frame.sequential:
+                child = next(frame.children, None)
+                if child is not None:
+                    push(child, frame.t, frame)
+                    frame.pending += 1
+            if frame.pending:
+                break
+            ends = frame.ends()
+            frame = frame.parent
 
 
 @dataclass
@@ -83,10 +416,10 @@ class Playable:
     """
 
     def __add__(self, other):
-        return Sequence(self.for_sequence() + other.for_sequence())
+        return Sequence(Rope.of(self.for_sequence()) + other.for_sequence())
 
     def __mul__(self, other):
-        return Sequence(self.for_sequence() * other)
+        return Sequence(Rope.of(self.for_sequence()) * other)
 
     def __or__(self, other):
         return Parallel(self.for_parallel() + other.for_parallel())
@@ -94,6 +427,10 @@ class Playable:
     def transpose(self, steps):
         return replace(self, children=[c.transpose(steps) for c in self.children])
 
+    def on_channel(self, channel):
+        "Move all the notes to the given MIDI channel."
+        return replace(self, children=[c.on_channel(channel) for c in self.children])
+
     def up(self, steps):
         return self.transpose(steps)
 
@@ -104,22 +441,32 @@ class Playable:
         "Apply a rhythmic value to the Playable."
 
     def render(self, root, bpm):
-        def ordering(e):
-            return ((e.time, isinstance(e, NoteOn), e.note),)
-
-        def filter(events):
-            on = Counter()
-            for e in sorted(events, key=ordering):
-                if isinstance(e, NoteOn):
-                    if on[e.note] == 0:
-                        yield e
-                    on[e.note] += 1
-                elif isinstance(e, NoteOff):
-                    on[e.note] -= 1
-                    if on[e.note] == 0:
-                        yield e
+        """
+        Render to an EventArray with the given root and tempo. The tempo
+        can be a bpm or anything TempoMap.of takes.
+        """
+        return flatten(self).render(root, TempoMap.of(bpm))
 
-        return list(filter(self.midi(0, root, (60 / bpm) * 4)))
+    def stream(self, root, bpm):
+        """
+        Lazily generate the same events render() would, in order. Playing
+        the stream starts as soon as the first event is generated and
+        only needs memory for the notes currently sounding so this works
+        for arbitrarily long or even infinite Sequences.
+        """
+        tempo = TempoMap.of(bpm)
+        on = Counter()
+        for e in stream_events(self, root):
+            e.time = tempo.time(e.time)
+            if isinstance(e, NoteOn):
+                if on[e.channel, e.note] == 0:
+                    yield e
+                on[e.channel, e.note] += 1
+            elif isinstance(e, NoteOff):
+                on[e.channel, e.note] -= 1
+                if on[e.channel, e.note] == 0:
+                    del on[e.channel, e.note]
+                    yield e
 
 
 @dataclass
@@ -131,23 +478,35 @@ class Note(Playable):
     specific root which will be mapped to pitch 0.
 
     Duration is in absract whole notes with the actual duration to be
-    determined when rendering to MIDI at a specific bpm.
+    determined when rendering to MIDI at a specific bpm. Fractions
+    are exact; floats are rounded to the nearest tick.
 
-    Velocity is the MIDI velocity (0-127). And
+    Velocity is the MIDI velocity (0-127). And channel is the MIDI
+    channel it is played on.
     """
 
     pitch: int
     duration: float = 1 / 4
     velocity: int = 100
+    channel: int = 0
 
-    def midi(self, start, root, whole_note):
+    def midi(self, start, root):
         note = root + self.pitch
-        yield NoteOn(note, self.velocity, start)
-        yield NoteOff(note, start + (self.duration * whole_note))
+        yield NoteOn(note, self.velocity, start, self.channel)
+        yield NoteOff(note, start + ticks(self.duration), self.channel)
+
+    def flatten_into(self, program, start):
+        duration = ticks(self.duration)
+        program.add(start, duration, self.pitch, self.velocity, self.channel)
+        end = start + duration
+        return end, end
 
     def transpose(self, steps):
         return replace(self, pitch=self.pitch + steps)
 
+    def on_channel(self, channel):
+        return replace(self, channel=channel)
+
     def rhythm(self, duration):
         return replace(self, duration=duration)
 
@@ -158,6 +517,96 @@ class Note(Playable):
         return [self]
 
 
+@dataclass(eq=False)
+class NoteArray(Playable):
+
+    """
+    A melody of many notes kept as parallel arrays of pitches,
+    durations, and velocities rather than a Sequence of Notes so that
+    transposing, changing the rhythm, and rendering are whole-array
+    operations. Plays like the equivalent Sequence of Notes and can be
+    combined with other Playables in the same ways.
+    """
+
+    pitches: np.ndarray
+    durations: np.ndarray
+    velocities: np.ndarray
+    channel: int = 0
+
+    @classmethod
+    def of(cls, pitches, duration=1 / 4, velocity=100):
+        pitches = np.asarray(pitches, dtype="i2")
+        n = len(pitches)
+        return cls(pitches, np.full(n, duration, dtype="f8"), np.full(n, velocity))
+
+    def __len__(self):
+        return len(self.pitches)
+
+    def __eq__(self, other):
+        if not isinstance(other, NoteArray):
+            return NotImplemented
+        return self.channel == other.channel and all(
+            np.array_equal(a, b)
+            for a, b in (
+                (self.pitches, other.pitches),
+                (self.durations, other.durations),
+                (self.velocities, other.velocities),
+            )
+        )
+
+    def tick_durations(self):
+        "The duration of each note in ticks."
+        return np.rint(self.durations * whole_note).astype("i8")
+
+    def onsets(self, start, durations):
+        "When each note starts, in ticks, given their durations in ticks."
+        return start + np.cumsum(durations) - durations
+
+    def midi(self, start, root):
+        durations = self.tick_durations()
+        onsets = self.onsets(start, durations)
+        for onset, duration, pitch, velocity in zip(
+            onsets.tolist(),
+            durations.tolist(),
+            self.pitches.tolist(),
+            self.velocities.tolist(),
+        ):
+            yield NoteOn(root + pitch, velocity, onset, self.channel)
+            yield NoteOff(root + pitch, onset + duration, self.channel)
+
+    def flatten_into(self, program, start):
+        if len(self) == 0:
+            return None, None
+        durations = self.tick_durations()
+        onsets = self.onsets(start, durations)
+        program.add_many(onsets, durations, self.pitches, self.velocities, self.channel)
+        end = int(onsets[-1] + durations[-1])
+        return end, end
+
+    def transpose(self, steps):
+        return replace(self, pitches=self.pitches + steps)
+
+    def on_channel(self, channel):
+        return replace(self, channel=channel)
+
+    def rhythm(self, durations):
+        """
+        Like Sequence.rhythm, either a single duration for every note or
+        an iterable of durations applied in a cycle.
+        """
+        try:
+            pattern = np.array(list(durations), dtype="f8")
+        except TypeError:
+            pattern = np.array([durations], dtype="f8")
+        return replace(self, durations=np.resize(pattern, len(self)))
+
+    def for_sequence(self):
+        return [self]
+
+    def for_parallel(self):
+        return [self]
+
+
 @dataclass
 class Rest(Playable):
 
@@ -167,12 +616,18 @@ class Rest(Playable):
 
     duration: float = 1 / 4
 
-    def midi(self, start, root, whole_note):
-        yield Time(start + (self.duration * whole_note))
+    def midi(self, start, root):
+        yield Time(start + ticks(self.duration))
+
+    def flatten_into(self, program, start):
+        return start + ticks(self.duration), None
 
     def transpose(self, steps):
         return self
 
+    def on_channel(self, channel):
+        return self
+
     def rhythm(self, duration):
         return replace(self, duration=duration)
 
@@ -190,17 +645,20 @@ class Sequence(Playable):
     A sequence of Playable things. When rendering to MIDI each child
     starts after its preceeding sibling finishes, i.e. after the last
     note off event.
+
+    Sequences built with + and * keep their children in a Rope so
+    building a long Sequence a note at a time isn't quadratic.
     """
 
     children: List[Playable]
 
-    def midi(self, start, root, whole_note):
+    def midi(self, start, root):
         t = start
         for c in self.children:
             # The child may emit multiple MIDI events but it is over
             # whenever the last event is. We don't assume that the
             # events are necessarily emitted in order.
-            for e in c.midi(t, root, whole_note):
+            for e in c.midi(t, root):
                 t = max(t, e.time)
                 if not isinstance(e, Time):
                     yield e
@@ -240,15 +698,30 @@ class Parallel(Playable):
 
     children: List[Playable]
 
-    def midi(self, start, root, whole_note):
+    def midi(self, start, root):
         for c in self.children:
-            yield from c.midi(start, root, whole_note)
+            yield from c.midi(start, root)
 
     def rhythm(self, duration):
         return replace(self, children=[c.rhythm(duration) for c in self.children])
 
+    def on_channels(self, channels=None):
+        """
+        Put each child on its own MIDI channel so they are rendered as
+        independent voices. By default uses the channels in order,
+        skipping the General MIDI drum channel.
+        """
+        channels = channels or voice_channels
+        children = [c.on_channel(ch) for c, ch in zip(self.children, channels)]
+        return replace(self, children=children)
+
     def for_sequence(self):
         return [self]
 
     def for_parallel(self):
         return self.children
+
+
+# Channels for Parallel.on_channels, skipping channel 10 (9 counting
+# from zero) which General MIDI uses for drums.
+voice_channels = [c for c in range(16) if c != 9]
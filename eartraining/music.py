@@ -1,12 +1,17 @@
 "API for manipulating musical elements."
 
 from dataclasses import dataclass
+from fractions import Fraction
 from typing import Tuple
 
+import numpy as np
+
 from eartraining.midi import Note
 from eartraining.midi import Parallel
 from eartraining.midi import Rest
 from eartraining.midi import Sequence
+from eartraining.pcsets import identify
+from eartraining.tempo import exact
 
 
 def chord(pitches):
@@ -35,10 +40,19 @@ def rest(duration):
 # a root of 0 and then let the actual root be set in the MIDI
 # rendering process.
 #
+# Scale.major and friends are the patterns; Scales.major and friends
+# are the corresponding Scale objects. The notes and diatonic chords of
+# every scale are looked up in a ScaleTable worked out in advance.
+#
+# Scales can also be in other equal temperaments, with the octave
+# divided into edo steps rather than 12 semitones, in which case the
+# pattern and the notes are in those steps. See eartraining.edo for
+# rendering them.
+#
 
 
-def scale(pattern, root=0):
-    return Scale(pattern, root)
+def scale(pattern, root=0, edo=12):
+    return Scale(pattern, root, edo)
 
 
 @dataclass
@@ -46,11 +60,16 @@ class Scale:
 
     pattern: Tuple[int]
     root: int = 0
+    edo: int = 12
 
     major = (0, 2, 4, 5, 7, 9, 11)
     minor = (0, 2, 3, 5, 7, 8, 10)
     pentatonic_major = (0, 2, 4, 7, 9)
 
+    @property
+    def table(self):
+        return scale_table(self.pattern, self.edo)
+
     @property
     def one_octave(self):
         return self.notes(range(1, len(self.pattern) + 1))
@@ -62,16 +81,20 @@ class Scale:
 
     def note(self, n):
         "Return the note of the scale at a given degree."
-        octave, degree = divmod(n - 1, len(self.pattern))
-        return self.root + self.pattern[degree] + (octave * 12)
+        return self.table.note(self.root, n)
 
     def notes(self, ns):
-        "List of notes corresponding to scale degrees."
+        """
+        Notes corresponding to scale degrees. A list for a list of
+        degrees or an array for an array.
+        """
+        if isinstance(ns, np.ndarray):
+            return self.table.notes(self.root, ns)
         return [self.note(n) for n in ns]
 
     def diatonic_chord(self, degree, notes):
         "Diatonic chord built on the given degree with the given number of notes."
-        return tuple(self.note(degree + i * 2) for i in range(notes))
+        return self.table.chord(self.root, degree, notes)
 
     def triad(self, n):
         "Diatonic triad."
@@ -81,12 +104,31 @@ class Scale:
         "Diatonic seventh chord."
         return self.diatonic_chord(n, 4)
 
+    def roman(self, degree, notes=3):
+        "Roman numeral of the diatonic chord on degree, if it has one."
+        if not 1 <= degree <= len(self.pattern):
+            raise ValueError(f"No degree {degree} in a {len(self.pattern)} note scale.")
+        return self.table.numerals[notes][degree - 1]
+
+    def mode(self, n):
+        "The nth mode of the scale, counting the scale itself as the first."
+        return Scale(mode(self.pattern, n, self.edo), self.root, self.edo)
+
+    def modes(self):
+        return [self.mode(n) for n in self.degrees]
+
 
 class Scales:
 
-    major = Scale((0, 2, 4, 5, 7, 9, 11))
-    minor = Scale((0, 2, 3, 5, 7, 8, 10))
-    pentatonic_major = Scale((0, 2, 4, 7, 9))
+    major = Scale(Scale.major)
+    minor = Scale(Scale.minor)
+    pentatonic_major = Scale(Scale.pentatonic_major)
+
+
+def mode(pattern, n, edo=12):
+    "Pattern of the nth mode of a scale pattern."
+    start = pattern[n - 1]
+    return tuple(sorted((p - start) % edo for p in pattern))
 
 
 def inversion(chord, inversion):
@@ -95,13 +137,14 @@ def inversion(chord, inversion):
 
 #
 # Rhythmic elements. Durations are expressed in terms of whole notes
-# so 1/4 is a quarter note.
+# so 1/4 is a quarter note. These return exact Fractions so they land
+# exactly on the tick timeline.
 #
 
 
 def dotted(d):
     "The duration of a dotted value."
-    return d * 1.5
+    return exact(d) * Fraction(3, 2)
 
 
 def tuplet(base, numerator, denominator):
@@ -111,7 +154,7 @@ def tuplet(base, numerator, denominator):
     in an eighth note triplet (three notes in the space of two eighth
     notes).
     """
-    return base * (denominator / numerator)
+    return exact(base) * Fraction(denominator, numerator)
 
 
 def triplet(base):
@@ -125,32 +168,47 @@ def triplet(base):
 
 roman_numerals = (None, "i", "ii", "iii", "iv", "v", "vi", "vii")
 
-romanization_fns = {
-    "major": str.upper,
-    "minor": str.lower,
-    "diminished": lambda d: d.lower() + "°",
-    "augmented": lambda d: d.upper + "⁺",
+# How each kind of chord is written as a roman numeral: the case of
+# the numeral and the quality mark that goes after it.
+romanizations = {
+    "Major": (str.upper, ""),
+    "Minor": (str.lower, ""),
+    "Diminished": (str.lower, "°"),
+    "Augmented": (str.upper, "⁺"),
+    "Dominant 7": (str.upper, ""),
+    "Major 7": (str.upper, "M"),
+    "Minor 7": (str.lower, ""),
+    "Minor 7♭5": (str.lower, "ø"),
+    "Diminished 7": (str.lower, "°"),
 }
 
-
-def roman(d, triad):
-    assert 1 <= d <= 7
-    numeral = roman_numerals[d]
-    fn = romanization_fns[kind_of_triad(triad)]
-    return fn(numeral)
+# Figured bass for each inversion of triads and seventh chords.
+inversion_figures = {
+    3: ("", "⁶", "⁶₄"),
+    4: ("⁷", "⁶₅", "⁴₃", "⁴₂"),
+}
 
 
-triads = {
-    (3, 3): "diminished",
-    (3, 4): "minor",
-    (4, 3): "major",
-    (4, 4): "augmented",
-}
+def roman(d, chord):
+    """
+    Roman numeral for a chord on scale degree d, e.g. V⁶₅ for a
+    dominant seventh chord on the fifth degree with its third in the
+    bass. The chord can be in any voicing.
+    """
+    assert 1 <= d <= 7
+    c = identify(chord)
+    if c is None or c.name not in romanizations:
+        raise ValueError(f"No roman numeral for {chord}.")
+    case, mark = romanizations[c.name]
+    return (
+        case(roman_numerals[d])
+        + mark
+        + inversion_figures[len(c.kind.tones)][c.inversion]
+    )
 
 
 def kind_of_triad(triad):
-    a, b, c = triad
-    return triads[(b - a, c - b)]
+    return identify(triad).name.lower()
 
 
 def classify_interval(a, b):
@@ -191,6 +249,111 @@ def chord_intervals(chord):
     return [intervals[chord[i] - chord[0]] for i in range(1, len(chord))]
 
 
+#
+# Scale tables.
+#
+
+
+class ScaleTable:
+
+    """
+    The notes of one scale pattern over a few octaves in each key (12
+    of them, or edo of them in other temperaments), along with the
+    diatonic triads and seventh chords on each degree and their roman
+    numerals, all worked out in advance. pitches, triads, and sevenths
+    are arrays indexed by key and degree less one. Roman numerals are
+    the same in every key and only worked out in 12-EDO.
+    """
+
+    def __init__(self, pattern, edo=12):
+        self.pattern = tuple(pattern)
+        self.edo = edo
+        n = len(pattern)
+        self.steps = np.array(self.pattern)
+
+        # At least three octaves and enough to stack a seventh chord on
+        # the top degree.
+        octave, step = np.divmod(np.arange(max(3 * n, n + 6)), n)
+        base = self.steps[step] + edo * octave
+        self.pitches = np.arange(edo)[:, None] + base
+
+        stack = np.arange(n)[:, None] + 2 * np.arange(4)
+        self.sevenths = self.pitches[:, stack]
+        self.triads = self.sevenths[:, :, :3]
+
+        # Plain Python lists for looking up one thing at a time.
+        self.pitch_lists = self.pitches.tolist()
+        self.chord_lists = {
+            3: [[tuple(c) for c in key] for key in self.triads.tolist()],
+            4: [[tuple(c) for c in key] for key in self.sevenths.tolist()],
+        }
+        self.numerals = {
+            notes: [
+                romanize(d, chord) if edo == 12 else None
+                for d, chord in enumerate(chords[0], 1)
+            ]
+            for notes, chords in self.chord_lists.items()
+        }
+
+    def note(self, root, n):
+        "The note at degree n of the scale on root."
+        key = root % self.edo
+        if 1 <= n <= len(self.pitch_lists[0]):
+            return self.pitch_lists[key][n - 1] + root - key
+        octave, degree = divmod(n - 1, len(self.pattern))
+        return root + self.pattern[degree] + (octave * self.edo)
+
+    def notes(self, roots, degrees):
+        """
+        The notes at an array of degrees, on a root or an array of
+        roots, in one go.
+        """
+        octave, step = np.divmod(np.asarray(degrees) - 1, len(self.pattern))
+        return np.asarray(roots) + self.steps[step] + self.edo * octave
+
+    def chord(self, root, degree, notes):
+        "Diatonic chord on degree with the given number of notes."
+        key = root % self.edo
+        if notes in self.chord_lists and 1 <= degree <= len(self.pattern):
+            chord = self.chord_lists[notes][key][degree - 1]
+            return chord if root == key else tuple(p + root - key for p in chord)
+        return tuple(self.note(root, degree + i * 2) for i in range(notes))
+
+
+def romanize(degree, chord):
+    """
+    Roman numeral for a chord stacked on a degree or None if it
+    doesn't have one. In scales that aren't built of thirds the notes
+    stacked on a degree may make a chord rooted somewhere else which
+    doesn't count.
+    """
+    c = identify(chord)
+    if degree > 7 or c is None or c.inversion:
+        return None
+    try:
+        return roman(degree, chord)
+    except ValueError:
+        return None
+
+
+scale_tables = {}
+
+
+def scale_table(pattern, edo=12):
+    "The ScaleTable for a pattern, making it the first time it's asked for."
+    key = (tuple(pattern), edo)
+    table = scale_tables.get(key)
+    if table is None:
+        table = scale_tables[key] = ScaleTable(*key)
+    return table
+
+
+# Every mode of the built in scales is ready to go.
+for pattern in (Scale.major, Scale.minor, Scale.pentatonic_major):
+    for degree in range(1, len(pattern) + 1):
+        scale_table(mode(pattern, degree))
+
+
 if __name__ == "__main__":
 
     s = Scales.major
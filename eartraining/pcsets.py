@@ -0,0 +1,141 @@
+"""
+Chord identification by pitch-class set.
+
+Any collection of notes, in any octave, voicing, or inversion, comes
+down to a set of pitch classes which we keep as a 12-bit mask with bit
+n set for pitch class n. We build a table over all 4096 masks, for
+each possible bass note, of the chord those notes make, if they make
+one, so identifying a chord is a single lookup.
+
+Some sets can be named more than one way: C E G A is both C6 and Am7
+and a diminished seventh chord has four possible roots. We prefer the
+chord whose root is in the bass and otherwise the chord that comes
+first in chord_kinds.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+from typing import Tuple
+
+note_names = ("C", "C♯", "D", "E♭", "E", "F", "F♯", "G", "A♭", "A", "B♭", "B")
+
+
+@dataclass(frozen=True)
+class ChordKind:
+    """
+    A kind of chord. Tones are in semitones above the root in the order
+    the chord is stacked up in thirds so a tone's index is also the
+    inversion with that tone in the bass.
+    """
+
+    name: str
+    symbol: str
+    tones: Tuple[int, ...]
+
+
+chord_kinds = [
+    ChordKind("Major", "", (0, 4, 7)),
+    ChordKind("Minor", "m", (0, 3, 7)),
+    ChordKind("Diminished", "°", (0, 3, 6)),
+    ChordKind("Augmented", "+", (0, 4, 8)),
+    ChordKind("Dominant 7", "7", (0, 4, 7, 10)),
+    ChordKind("Major 7", "maj7", (0, 4, 7, 11)),
+    ChordKind("Minor 7", "m7", (0, 3, 7, 10)),
+    ChordKind("Minor 7♭5", "m7♭5", (0, 3, 6, 10)),
+    ChordKind("Diminished 7", "°7", (0, 3, 6, 9)),
+    ChordKind("Minor major 7", "m(maj7)", (0, 3, 7, 11)),
+    ChordKind("Augmented 7", "+7", (0, 4, 8, 10)),
+    ChordKind("Augmented major 7", "+maj7", (0, 4, 8, 11)),
+    ChordKind("Suspended 4", "sus4", (0, 5, 7)),
+    ChordKind("Suspended 2", "sus2", (0, 2, 7)),
+    ChordKind("Dominant 7 sus4", "7sus4", (0, 5, 7, 10)),
+    ChordKind("Major 6", "6", (0, 4, 7, 9)),
+    ChordKind("Minor 6", "m6", (0, 3, 7, 9)),
+    ChordKind("Add 9", "add9", (0, 4, 7, 14)),
+    ChordKind("Minor add 9", "m(add9)", (0, 3, 7, 14)),
+    ChordKind("6/9", "6/9", (0, 4, 7, 9, 14)),
+    ChordKind("Dominant 9", "9", (0, 4, 7, 10, 14)),
+    ChordKind("Major 9", "maj9", (0, 4, 7, 11, 14)),
+    ChordKind("Minor 9", "m9", (0, 3, 7, 10, 14)),
+    ChordKind("Dominant 11", "11", (0, 4, 7, 10, 14, 17)),
+    ChordKind("Minor 11", "m11", (0, 3, 7, 10, 14, 17)),
+    ChordKind("Dominant 13", "13", (0, 4, 7, 10, 14, 21)),
+    ChordKind("Major 13", "maj13", (0, 4, 7, 11, 14, 21)),
+    ChordKind("Minor 13", "m13", (0, 3, 7, 10, 14, 21)),
+    ChordKind("Dominant 7♭5", "7♭5", (0, 4, 6, 10)),
+    ChordKind("Dominant 7♭9", "7♭9", (0, 4, 7, 10, 13)),
+    ChordKind("Dominant 7♯9", "7♯9", (0, 4, 7, 10, 15)),
+    ChordKind("Dominant 7♯11", "7♯11", (0, 4, 7, 10, 18)),
+    ChordKind("Dominant 7♭13", "7♭13", (0, 4, 7, 10, 20)),
+    ChordKind("Dominant 7 no 5", "7(no5)", (0, 4, 10)),
+    ChordKind("Major 7 no 5", "maj7(no5)", (0, 4, 11)),
+    ChordKind("Minor 7 no 5", "m7(no5)", (0, 3, 10)),
+    ChordKind("Power", "5", (0, 7)),
+]
+
+
+@dataclass(frozen=True)
+class Chord:
+    "A kind of chord on a given root pitch class, in a given inversion."
+
+    kind: ChordKind
+    root: int
+    inversion: int
+
+    @property
+    def name(self):
+        return self.kind.name
+
+    @property
+    def bass(self):
+        return (self.root + self.kind.tones[self.inversion]) % 12
+
+    @property
+    def label(self):
+        "A chord symbol like E♭m7/G."
+        label = note_names[self.root] + self.kind.symbol
+        if self.inversion:
+            label += "/" + note_names[self.bass]
+        return label
+
+
+def mask(notes, edo=12):
+    """
+    The 12-bit mask of the pitch classes of notes, or edo bits in other
+    equal temperaments.
+    """
+    m = 0
+    for n in notes:
+        m |= 1 << (n % edo)
+    return m
+
+
+def build_index():
+    """
+    A table of the Chord for every mask and bass pitch class, indexed
+    by mask * 12 + bass, with None where the notes don't make a chord
+    we know.
+    """
+    candidates = [[] for _ in range(4096)]
+    for kind in chord_kinds:
+        for root in range(12):
+            candidates[mask(root + t for t in kind.tones)].append((kind, root))
+
+    index = [None] * (4096 * 12)
+    for m, chords in enumerate(candidates):
+        if not chords:
+            continue
+        for bass in range(12):
+            if m >> bass & 1:
+                kind, root = next(((k, r) for k, r in chords if r == bass), chords[0])
+                tones = [(root + t) % 12 for t in kind.tones]
+                index[m * 12 + bass] = Chord(kind, root, tones.index(bass))
+    return index
+
+
+index = build_index()
+
+
+def identify(notes) -> Optional[Chord]:
+    "The chord notes make, with the lowest note taken as the bass."
+    return index[mask(notes) * 12 + min(notes) % 12]
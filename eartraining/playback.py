@@ -0,0 +1,178 @@
+"""
+Non-blocking playback. A Player owns the MIDI output and plays
+rendered events on a background thread so the UI can keep handling
+events while a question is playing.
+
+Playing a new phrase cuts off whatever is currently playing (turning
+off any notes that are sounding) unless it is played inside a
+queueing() block in which case it waits its turn. When a phrase
+finishes or is cut off we post a Player.DONE event.
+
+If the output was opened with a non-zero latency, PortMidi honors
+timestamps on the messages we write to it. In that case, rather than
+waking up for every event, we hand it timestamped batches a little
+ahead of time and let it do the timing.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import pygame
+import pygame.event
+
+from eartraining import timing
+from eartraining.backends import midi_time
+from eartraining.midi import NoteOff
+from eartraining.midi import NoteOn
+
+# How far ahead, in seconds, to write events when PortMidi is doing
+# the timing.
+lookahead = 0.1
+
+# Most messages to hand to Output.write at once.
+max_write = 1024
+
+
+class Player:
+
+    DONE = pygame.event.custom_type()
+
+    def __init__(self, midi_out, priority=None, latency=0):
+        self.midi_out = midi_out
+        self.priority = priority
+        self.latency = latency
+        self.phrases = queue.Queue()
+        self.wakeup = threading.Event()
+        self.generation = 0
+        self.cutoff = 0
+        self.queue_only = False
+        self.sounding = set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def play(self, events):
+        "Play the events, cutting off the current phrase unless queueing."
+        self.generation += 1
+        if not self.queue_only:
+            self.cutoff = self.generation
+            self.wakeup.set()
+        self.phrases.put((self.generation, events))
+
+    def cancel(self):
+        "Cut off the current phrase and anything queued after it."
+        self.generation += 1
+        self.cutoff = self.generation
+        self.wakeup.set()
+
+    @contextmanager
+    def queueing(self):
+        "Within the body, play() queues phrases behind what's playing."
+        self.queue_only = True
+        try:
+            yield
+        finally:
+            self.queue_only = False
+
+    def close(self):
+        self.cancel()
+        self.phrases.put(None)
+        self.thread.join()
+
+    def run(self):
+        while (phrase := self.phrases.get()) is not None:
+            generation, events = phrase
+            if generation < self.cutoff:
+                continue
+            finished = self.play_phrase(generation, events)
+            pygame.event.post(pygame.event.Event(Player.DONE, cancelled=not finished))
+
+    def play_phrase(self, generation, events):
+        """
+        Play one phrase on the player thread. Returns False if the phrase
+        was cut off before the end.
+        """
+        if self.latency:
+            return self.write_phrase(generation, events)
+
+        with timing.realtime(self.priority):
+            t_zero = time.perf_counter()
+            for e in events:
+                timing.collect_if_idle(t_zero + e.time)
+                if not self.wait_until(t_zero + e.time, generation):
+                    self.silence()
+                    return False
+                achieved = timing.wait_until(t_zero + e.time)
+                e.emit(self.midi_out)
+                timing.jitter.record(e.time, achieved - t_zero)
+                if isinstance(e, NoteOn):
+                    self.sounding.add((e.note, e.channel))
+                elif isinstance(e, NoteOff):
+                    self.sounding.discard((e.note, e.channel))
+        return True
+
+    def write_phrase(self, generation, events):
+        """
+        Write the phrase to PortMidi in timestamped batches, each written
+        lookahead seconds before it is due. Returns False if the phrase
+        was cut off before the end.
+        """
+        t_zero = time.perf_counter()
+        start = midi_time()
+        batch = []
+        written = start
+        for e in events:
+            at = start + round(e.time * 1000)
+            if batch and (
+                len(batch) == max_write or at > batch[0][1] + lookahead * 1000
+            ):
+                self.midi_out.write(batch)
+                written = batch[-1][1]
+                batch = []
+            if not batch:
+                if not self.wait_until(t_zero + e.time - lookahead, generation):
+                    self.silence(written)
+                    return False
+            batch.append([e.message(), at])
+            if isinstance(e, NoteOn):
+                self.sounding.add((e.note, e.channel))
+            elif isinstance(e, NoteOff):
+                self.sounding.discard((e.note, e.channel))
+
+        if batch:
+            self.midi_out.write(batch)
+            written = batch[-1][1]
+
+        # Hang around until PortMidi has actually played everything.
+        end = t_zero + (written - start + self.latency) / 1000
+        if not self.wait_until(end, generation):
+            self.silence(written)
+            return False
+        return True
+
+    def wait_until(self, at, generation):
+        """
+        Sleep until just before at, waking up early if the phrase is cut
+        off. Returns False if it has been.
+        """
+        while generation >= self.cutoff:
+            remaining = at - time.perf_counter() - timing.spin_time
+            if remaining <= 0:
+                return True
+            if self.wakeup.wait(remaining):
+                self.wakeup.clear()
+        return False
+
+    def silence(self, written=None):
+        """
+        Turn off any sounding notes. If we've already written notes that
+        PortMidi hasn't played yet, written is the timestamp of the last
+        one and we also turn the notes off after that.
+        """
+        offs = [NoteOff(note, 0, channel) for note, channel in self.sounding]
+        for off in offs:
+            off.emit(self.midi_out)
+        if written is not None and offs:
+            self.midi_out.write([[off.message(), written] for off in offs])
+        self.sounding.clear()
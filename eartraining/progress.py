@@ -0,0 +1,179 @@
+"""
+Keeping progress from one session to the next.
+
+Every answer is appended to a log in an SQLite database as (time,
+question id, chosen id, latency), along with which session it was
+given in. The database is in WAL mode so each
+answer is a small sequential write rather than a rewrite of the file.
+Every so often we also save a snapshot of the state of whatever is
+keeping score, a quiz or a scheduler, along with the last answer the
+snapshot includes. Starting up loads the latest snapshot and replays
+only the answers logged since, so it stays quick however long the log
+gets.
+
+Things that can be saved need four methods: state(), returning
+something that can be stored as JSON, restore(state), replay(answers),
+which applies a list of logged (question, chosen) pairs of ids as if
+they had just been answered, starting with the first answer to a
+question, and labels(), the labels of the questions the ids stand for.
+Snapshots are only taken after right answers and each session starts
+on a new question so we replay the answers a session at a time.
+
+The ids only mean something for one set of questions so the log is
+kept under the quiz's name along with the labels of its questions, and
+snapshots save the labels too. We refuse to restore a snapshot whose
+labels don't match.
+
+The database is the file named by the EARTRAINING_PROGRESS environment
+variable, defaulting to ~/.eartraining.sqlite. Set it to an empty
+string to not save anything.
+"""
+
+import itertools
+import json
+import os
+import sqlite3
+import time
+
+schema = """
+create table if not exists answers (
+    seq integer primary key,
+    quiz text not null,
+    session integer not null,
+    time real not null,
+    question integer not null,
+    chosen integer not null,
+    latency real not null
+);
+create index if not exists answers_by_quiz on answers (quiz, seq);
+create table if not exists snapshots (
+    quiz text not null,
+    seq integer not null,
+    time real not null,
+    state text not null,
+    primary key (quiz, seq)
+);
+"""
+
+
+class Progress:
+
+    """
+    The answer log and snapshots for the quiz called name in the
+    database at path, taking a new snapshot once snapshot_every
+    answers have been logged since the last.
+    """
+
+    def __init__(self, path, name, snapshot_every=100):
+        self.db = sqlite3.connect(path)
+        self.db.execute("pragma journal_mode=wal")
+        # In WAL mode this is still safe against corruption; a crash
+        # can only lose the last few answers.
+        self.db.execute("pragma synchronous=normal")
+        self.db.executescript(schema)
+        self.name = name
+        self.snapshot_every = snapshot_every
+        self.target = None
+        self.last_seq = 0
+        self.since_snapshot = 0
+        (last_session,) = self.db.execute(
+            "select max(session) from answers where quiz = ?", (name,)
+        ).fetchone()
+        self.session = 0 if last_session is None else last_session + 1
+
+    def load(self, target):
+        """
+        Bring target up to date from the latest snapshot and the answers
+        logged after it. Its answers are recorded from here on.
+        """
+        self.target = target
+        row = self.db.execute(
+            "select seq, state from snapshots where quiz = ? order by seq desc limit 1",
+            (self.name,),
+        ).fetchone()
+        seq = 0
+        if row is not None:
+            seq, snapshot = row
+            snapshot = json.loads(snapshot)
+            target.restore(snapshot["state"])
+            labels = snapshot["labels"]
+            if target.labels()[: len(labels)] != labels:
+                raise ValueError(
+                    f"Progress for {self.name} is for questions {labels},"
+                    f" not {target.labels()}."
+                )
+        tail = self.db.execute(
+            "select seq, session, question, chosen from answers"
+            " where quiz = ? and seq > ? order by seq",
+            (self.name, seq),
+        ).fetchall()
+        for _, answers in itertools.groupby(tail, key=lambda row: row[1]):
+            target.replay([(question, chosen) for _, _, question, chosen in answers])
+        if tail:
+            seq = tail[-1][0]
+        self.last_seq = seq
+        self.since_snapshot = len(tail)
+
+    def record(self, question, chosen, latency):
+        """
+        Log an answer, after it has been applied to the target. We only
+        take snapshots after right answers, which finish a question, so
+        replaying starts from the first answer to a question.
+        """
+        with self.db:
+            cursor = self.db.execute(
+                "insert into answers (quiz, session, time, question, chosen, latency)"
+                " values (?, ?, ?, ?, ?, ?)",
+                (self.name, self.session, time.time(), question, chosen, latency),
+            )
+        self.last_seq = cursor.lastrowid
+        self.since_snapshot += 1
+        if self.since_snapshot >= self.snapshot_every and question == chosen:
+            self.snapshot()
+
+    def snapshot(self):
+        "Save the target's state as of the last answer, replacing older snapshots."
+        state = json.dumps(
+            {"labels": self.target.labels(), "state": self.target.state()}
+        )
+        with self.db:
+            self.db.execute(
+                "insert or replace into snapshots values (?, ?, ?, ?)",
+                (self.name, self.last_seq, time.time(), state),
+            )
+            self.db.execute(
+                "delete from snapshots where quiz = ? and seq < ?",
+                (self.name, self.last_seq),
+            )
+        self.since_snapshot = 0
+
+    def answers(self):
+        "All the logged (time, question, chosen, latency) answers, oldest first."
+        return self.db.execute(
+            "select time, question, chosen, latency from answers"
+            " where quiz = ? order by seq",
+            (self.name,),
+        ).fetchall()
+
+    def close(self):
+        # No snapshot here: by now the next question has been counted as
+        # asked, which the log would never replay. The answers since the
+        # last snapshot are replayed next time instead.
+        self.db.close()
+
+
+def open_progress(name, target, path=None):
+    """
+    Open the progress for the quiz called name, with target's questions,
+    and load it into target, or return None if target can't be saved or
+    saving is turned off.
+    """
+    if path is None:
+        path = os.environ.get(
+            "EARTRAINING_PROGRESS", os.path.expanduser("~/.eartraining.sqlite")
+        )
+    if not path or not hasattr(target, "state"):
+        return None
+    progress = Progress(path, f"{name}: {', '.join(target.labels())}")
+    progress.load(target)
+    return progress
@@ -29,6 +29,16 @@ class FixedQuiz(Quiz):
         ts = enumerate(self.templates)
         return [t.instantiate(i, *args) for i, t in ts]
 
+    def state(self):
+        return {"right": self.right, "asked": self.asked}
+
+    def restore(self, state):
+        self.right = state["right"]
+        self.asked = state["asked"]
+
+    def count_asked(self, idx):
+        self.asked += 1
+
     def make_questions(self, choices):
         idx = random.randrange(len(choices))
         self.asked += 1
@@ -68,6 +78,17 @@ class ProgressiveQuiz(Quiz):
         ts = enumerate(self.templates[: self.active])
         return [t.instantiate(i, *args) for i, t in ts]
 
+    def state(self):
+        return {"active": self.active, "scores": self.scores, "asked": self.asked}
+
+    def restore(self, state):
+        self.active = state["active"]
+        self.scores = state["scores"]
+        self.asked = state["asked"]
+
+    def count_asked(self, idx):
+        self.asked[idx] += 1
+
     def make_questions(self, choices):
         idx = random.randrange(len(choices))
         self.asked[idx] += 1
@@ -108,10 +129,17 @@ class PlusMinusProgressiveQuiz(Quiz):
         self.scores = defaultdict(int)
         self.deactivated = []
         self.first_answer = True
+        self.replaying = False
 
     def status_text(self):
         return f"To go: {self.to_go()}"
 
+    def print_scores(self):
+        scores = "|".join(
+            str(self.scores[i]) for i in range(len(self.templates)) if i in self.active
+        )
+        print(f"scores: {scores}; to go: {self.to_go()} (avg. {self.average_to_go()})")
+
     def make_choices(self):
         args = next(self.arg_generator)
         self.first_answer = True
@@ -121,6 +149,28 @@ class PlusMinusProgressiveQuiz(Quiz):
             if i in self.active
         ]
 
+    def state(self):
+        return {
+            "active": sorted(self.active),
+            # Reading scores adds zeros to the defaultdict so leave them
+            # out to get the same state however we got here.
+            "scores": sorted((i, s) for i, s in self.scores.items() if s),
+            "deactivated": self.deactivated,
+        }
+
+    def restore(self, state):
+        self.active = set(state["active"])
+        self.scores = defaultdict(int, state["scores"])
+        self.deactivated = state["deactivated"]
+
+    def replay(self, answers):
+        # Scores are only printed for answers as they're given.
+        self.replaying = True
+        try:
+            super().replay(answers)
+        finally:
+            self.replaying = False
+
     def make_questions(self, choices):
         # FIXME: align may only apply to chords.
         choice = random.choice(choices)
@@ -149,11 +199,8 @@ class PlusMinusProgressiveQuiz(Quiz):
             self.scores[question.idx] -= 1
             self.scores[choice.idx] -= 1
 
-        scores = "|".join(
-            str(self.scores[i]) for i in range(len(self.templates)) if i in self.active
-        )
-
-        print(f"scores: {scores}; to go: {self.to_go()} (avg. {self.average_to_go()})")
+        if not self.replaying:
+            self.print_scores()
 
         if all(self.scores[i] >= self.score_threshold for i in self.active):
             # If all questions are above postive threshold, add the
@@ -8,11 +8,12 @@ from typing import Tuple
 
 from eartraining.app import Question
 from eartraining.app import QuizUI
-from eartraining.midi import play
+from eartraining.cache import render
 from eartraining.music import chord
 from eartraining.music import chord_types
 from eartraining.music import melody
 from eartraining.music import rest
+from eartraining.pcsets import identify
 from eartraining.progressive import FixedQuiz
 
 
@@ -22,6 +23,10 @@ class ChordTemplate:
 
     notes: Tuple[int, ...]
 
+    @property
+    def label(self):
+        return identify(self.notes).name
+
     def instantiate(self, idx, root):
         return ChordQuestion(idx, self.notes, root)
 
@@ -35,18 +40,18 @@ class ChordQuestion(Question):
 
     @property
     def label(self):
-        return chord_types[self.notes]
+        return identify(self.notes).name
 
-    def play(self, midi_out):
-        play(midi_out, chord(self.notes).render(self.root, 120))
+    def play(self, player):
+        player.play(render(chord(self.notes), self.root, 120))
 
-    def hint(self, midi_out):
+    def hint(self, player):
         seq = (
             melody(self.notes).rhythm(1 / 8)
             + rest(1 / 8)
             + chord(self.notes).rhythm(1 / 4)
         )
-        play(midi_out, seq.render(self.root, 120))
+        player.play(render(seq, self.root, 120))
 
     def align(self, other):
         # Find the root for the other chord such that common
@@ -5,12 +5,12 @@
 from dataclasses import dataclass
 from typing import Tuple
 
+from eartraining.cache import render
 from eartraining.grid import Question
 from eartraining.grid import QuestionGrid
 from eartraining.grid import Quiz
 from eartraining.grid import QuizUI
 from eartraining.grid import Row
-from eartraining.midi import play
 from eartraining.music import Scales
 from eartraining.music import chord
 from eartraining.music import melody
@@ -23,16 +23,16 @@ class DiatonicChordQuestion(Question):
     label: str
     notes: Tuple[int, ...]
 
-    def play(self, midi_out, root):
-        play(midi_out, chord(self.notes).render(root, 120))
+    def play(self, player, root):
+        player.play(render(chord(self.notes), root, 120))
 
-    def hint(self, midi_out, root):
+    def hint(self, player, root):
         seq = (
             melody(self.notes).rhythm(1 / 8)
             + rest(1 / 8)
             + chord(self.notes).rhythm(1 / 4)
         )
-        play(midi_out, seq.render(root, 120))
+        player.play(render(seq, root, 120))
 
 
 class DiatonicChordQuiz(Quiz):
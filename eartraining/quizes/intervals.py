@@ -5,7 +5,7 @@ from dataclasses import dataclass
 
 from eartraining.app import Question
 from eartraining.app import QuizUI
-from eartraining.midi import play
+from eartraining.cache import render
 from eartraining.music import intervals
 from eartraining.music import melody
 from eartraining.progressive import FixedQuiz
@@ -18,6 +18,10 @@ class IntervalTemplate:
 
     distance: int
 
+    @property
+    def label(self):
+        return intervals[self.distance]
+
     def instantiate(self, idx, root, ascending):
         return IntervalQuestion(idx, self.distance, root, ascending)
 
@@ -34,13 +38,13 @@ class IntervalQuestion(Question):
     def label(self):
         return intervals[self.distance]
 
-    def play(self, midi_out):
+    def play(self, player):
         second_note = self.distance if self.ascending else -self.distance
-        play(midi_out, melody((0, second_note)).render(self.root, speed))
+        player.play(render(melody((0, second_note)), self.root, speed))
 
-    def hint(self, midi_out):
+    def hint(self, player):
         second_note = -self.distance if self.ascending else self.distance
-        play(midi_out, melody((0, second_note)).render(self.root, speed))
+        player.play(render(melody((0, second_note)), self.root, speed))
 
     def align(self, other):
         return other
@@ -8,23 +8,21 @@ from itertools import permutations
 
 from eartraining.app import Question
 from eartraining.app import Quiz
-from eartraining.midi import play
 from eartraining.music import Scale
 from eartraining.music import Sequence
 from eartraining.music import chord
 from eartraining.music import inversion
-from eartraining.music import roman
 
 
 class ProgressionQuestion(Question):
     def __init__(self, progression, scale=Scale.major):
         s = Scale(scale)
         chords = [s.triad(d) for d in progression]
-        self.label = "-".join(roman(d, c) for d, c in zip(progression, chords))
+        self.label = "-".join(s.roman(d) for d in progression)
         self.midi = Sequence([random_voicing(c) for c in chords]).render(60, 120)
 
-    def play(self, midi_out):
-        play(midi_out, self.midi)
+    def play(self, player):
+        player.play(self.midi)
 
 
 class ProgressionQuiz(Quiz):
@@ -6,7 +6,7 @@
 from eartraining.app import Question
 from eartraining.app import Quiz
 from eartraining.app import QuizUI
-from eartraining.midi import play
+from eartraining.cache import render
 from eartraining.music import Scale
 from eartraining.music import melody
 from eartraining.music import rest
@@ -20,13 +20,13 @@ class SolfegeQuestion(Question):
         self.degree = degree
         self.scale = Scale(scale)
 
-    def play(self, midi_out):
-        play(midi_out, melody((0, self.scale.note(self.degree))).render(60, 120))
+    def play(self, player):
+        player.play(render(melody((0, self.scale.note(self.degree))), 60, 120))
 
-    def after_correct(self, midi_out):
+    def after_correct(self, player):
         pitches = [self.scale.note(d) for d in range(self.degree, 0, -1)]
         midi = melody(pitches).rhythm(1 / 8) + rest(1 / 4)
-        play(midi_out, midi.render(60, 120))
+        player.play(render(midi, 60, 120))
 
 
 class SolfegeQuiz(Quiz):
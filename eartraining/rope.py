@@ -0,0 +1,134 @@
+"""
+Ropes: persistent sequences that can be concatenated and repeated
+without copying.
+
+A rope is a balanced (AVL) binary tree whose leaves hold short tuples
+of items. Concatenating two ropes shares both of them and only builds
+O(log n) new nodes along the seam and repeating a rope n times takes
+O(log n) concatenations. Adding single items one at a time, as when
+building a melody note by note, tops up the last leaf until it is
+full rather than making a leaf per item.
+"""
+
+# Most items we put in one leaf.
+leaf_size = 32
+
+
+class Rope:
+
+    __slots__ = ("items", "left", "right", "length", "height")
+
+    def __init__(self, items=(), left=None, right=None):
+        self.items = items
+        self.left = left
+        self.right = right
+        if left is None:
+            self.length = len(items)
+            self.height = 0
+        else:
+            self.length = left.length + right.length
+            self.height = 1 + max(left.height, right.height)
+
+    @classmethod
+    def of(cls, items):
+        "Make a balanced rope from an iterable. Ropes are returned as is."
+        if isinstance(items, Rope):
+            return items
+        items = tuple(items)
+        level = [
+            cls(items[i : i + leaf_size]) for i in range(0, len(items), leaf_size)
+        ]
+        if not level:
+            return cls()
+        while len(level) > 1:
+            pairs = [cls(left=a, right=b) for a, b in zip(level[::2], level[1::2])]
+            level = pairs + level[len(pairs) * 2 :]
+        return level[0]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.left is None:
+                yield from node.items
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+
+    def __add__(self, other):
+        return join(self, Rope.of(other))
+
+    def __radd__(self, other):
+        return join(Rope.of(other), self)
+
+    def __mul__(self, n):
+        result = Rope()
+        power = self
+        while n > 0:
+            if n & 1:
+                result = join(result, power)
+            power = join(power, power)
+            n >>= 1
+        return result
+
+    def append(self, item):
+        "A new rope with item added at the end."
+        return join(self, Rope((item,)))
+
+    def __eq__(self, other):
+        if isinstance(other, (Rope, list, tuple)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Rope({list(self)!r})"
+
+
+def join(a, b):
+    "Concatenate two ropes, rebalancing along the seam."
+    if a.length == 0:
+        return b
+    if b.length == 0:
+        return a
+
+    if a.height == b.height == 0 and a.length + b.length <= leaf_size:
+        return Rope(a.items + b.items)
+    # A leaf joined onto a bigger rope goes down to the leaf at the seam
+    # so it can be topped up.
+    elif abs(a.height - b.height) <= 1 and (a.height == 0) == (b.height == 0):
+        return Rope(left=a, right=b)
+    elif a.height > b.height:
+        return balance(a.left, join(a.right, b))
+    else:
+        return balance(join(a, b.left), b.right)
+
+
+def balance(a, b):
+    "Join two ropes whose heights differ by at most two with a single node."
+    if a.height > b.height + 1:
+        if a.left.height >= a.right.height:
+            return Rope(left=a.left, right=Rope(left=a.right, right=b))
+        else:
+            inner = a.right
+            return Rope(
+                left=Rope(left=a.left, right=inner.left),
+                right=Rope(left=inner.right, right=b),
+            )
+    elif b.height > a.height + 1:
+        if b.right.height >= b.left.height:
+            return Rope(left=Rope(left=a, right=b.left), right=b.right)
+        else:
+            inner = b.left
+            return Rope(
+                left=Rope(left=a, right=inner.left),
+                right=Rope(left=inner.right, right=b.right),
+            )
+    else:
+        return Rope(left=a, right=b)
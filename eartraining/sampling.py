@@ -0,0 +1,98 @@
+"""
+Weighted random sampling from a changing collection.
+
+random.choices needs all the weights every time it's called which
+makes drawing from a large pool O(n). A WeightTree keeps the weights
+in a Fenwick tree so that changing a weight and drawing an item in
+proportion to its weight are both O(log n).
+
+Changes are made to the tree as differences, which is only as precise
+as the biggest numbers involved. If a big weight is swapped for a tiny
+one when the rest are tiny too the sums are left with little but
+rounding error, so when a change is far bigger than the total it
+leaves we rebuild the tree from the weights themselves. We also
+rebuild after every n changes so small errors can't add up.
+"""
+
+import random
+
+# How much smaller than a change the total can end up before we rebuild.
+cancellation_limit = 2.0**-20
+
+
+class WeightTree:
+
+    """
+    Non-negative weights indexed from 0 in the order they were added.
+    tree is a Fenwick tree, indexed from 1, where tree[i] holds the sum
+    of the weights from i - (i & -i) up to i - 1.
+    """
+
+    def __init__(self, weights=()):
+        self.rebuild(list(weights))
+
+    def rebuild(self, weights):
+        "Replace all the weights at once in O(n)."
+        self.weights = weights
+        self.changes = 0
+        size = 1
+        while size < len(weights):
+            size *= 2
+        self.tree = [0.0] + [float(w) for w in weights] + [0.0] * (size - len(weights))
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __getitem__(self, i):
+        return self.weights[i]
+
+    def __setitem__(self, i, weight):
+        delta = weight - self.weights[i]
+        self.weights[i] = weight
+        self.changes += 1
+        if not self.add(i, delta) or self.changes > len(self.weights):
+            self.rebuild(self.weights)
+
+    def add(self, i, delta):
+        """
+        Add delta to the sums covering weight i, which should then be
+        set to match. Returns False if the total lost too much
+        precision, in which case the tree needs rebuilding.
+        """
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+        return self.total() >= -delta * cancellation_limit
+
+    def append(self, weight):
+        "Add a weight, returning its index."
+        if len(self.weights) == len(self.tree) - 1:
+            self.rebuild(self.weights + [weight])
+        else:
+            self.weights.append(weight)
+            self.add(len(self.weights) - 1, weight)
+            self.changes += 1
+        return len(self.weights) - 1
+
+    def total(self):
+        return self.tree[-1] if len(self.tree) > 1 else 0.0
+
+    def find(self, u):
+        "The index of the weight covering u in the running total of weights."
+        i = 0
+        step = len(self.tree) - 1
+        while step:
+            if i + step < len(self.tree) and self.tree[i + step] <= u:
+                i += step
+                u -= self.tree[i]
+            step //= 2
+        return min(i, len(self.weights) - 1)
+
+    def sample(self, rng=random):
+        "Pick an index with probability proportional to its weight."
+        return self.find(rng.random() * self.total())
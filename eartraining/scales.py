@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+
+"""
+Catalog of all the scales following a few rules:
+
+  - Only steps of 1, 2, or 3 semi-tones are allowed.
+
+  - No consecutive half-steps.
+
+  - No minor thirds after a whole step.
+
+  - Only a half step after a minor third.
+
+Or to put it another way, every *two* steps must be either a minor or
+major third apart. The rules wrap around the octave so every mode of a
+scale in the catalog is also in the catalog.
+
+The same rules work in any equal temperament, with the octave divided
+into edo steps rather than 12 semitones, taking the thirds to be the
+steps closest to a just minor and major third. In 12-EDO that gives
+exactly the rules above. Other temperaments have many more scales so
+we prune patterns that can't be finished and can spread the work over
+several processes.
+
+The scales are kept as masks of their pitch classes, edo bits wide, as
+in eartraining.pcsets, so questions like which scales contain a chord
+or which are closest to each other are a few bit operations over an
+array of masks.
+"""
+
+import argparse
+from dataclasses import dataclass
+from functools import cached_property
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from eartraining.edo import thirds
+from eartraining.music import Scale
+from eartraining.music import mode
+from eartraining.pcsets import mask
+
+
+@dataclass(frozen=True)
+class Rules:
+
+    """
+    Which steps can follow which in an N-EDO: any two steps in a row
+    have to add up to one of the given intervals, by default the
+    minor and major thirds.
+    """
+
+    edo: int = 12
+    intervals: Tuple[int, ...] = ()
+
+    def __post_init__(self):
+        if self.edo > 62:
+            raise ValueError("Masks only have room for up to 62-EDO.")
+        if not self.intervals:
+            object.__setattr__(self, "intervals", thirds(self.edo))
+
+    @cached_property
+    def steps(self):
+        return tuple(range(1, max(self.intervals)))
+
+    @cached_property
+    def can_follow(self):
+        return {
+            s: tuple(t for t in self.steps if s + t in self.intervals)
+            for s in self.steps
+        }
+
+
+@lru_cache(maxsize=None)
+def count(rules, total, last, first):
+    """
+    The number of ways to finish a pattern that has got to total steps
+    with a step of last after starting with a step of first. The step
+    that gets back to the octave has to be allowed to come before the
+    first step. Zero means we can prune the pattern right here.
+    """
+    n = 0
+    for s in rules.can_follow[last]:
+        if total + s == rules.edo:
+            n += first in rules.can_follow[s]
+        elif total + s < rules.edo:
+            n += count(rules, total + s, s, first)
+    return n
+
+
+def prefixes(rules):
+    "Starts of patterns, the first two steps, to split the work up by."
+    for first in rules.steps:
+        for second in rules.can_follow[first]:
+            if first + second < rules.edo and count(
+                rules, first + second, second, first
+            ):
+                yield first, second
+
+
+def enumerate_prefix(rules, prefix):
+    """
+    Masks of all the valid scales starting with prefix as an array.
+    We extend all the partial patterns by one step at a time as arrays
+    of (total, last step, mask), dropping the ones that can't be
+    finished, so the work is a few array operations per step rather
+    than per pattern.
+    """
+    first, second = prefix
+    edo = rules.edo
+    top = max(rules.steps) + 1
+
+    # follows[a, b]: b can follow a. closes[s]: s can be the last step.
+    # finishable[t, s]: a pattern at t after a step of s can be finished.
+    follows = np.zeros((top, top), dtype=bool)
+    for a, bs in rules.can_follow.items():
+        follows[a, list(bs)] = True
+    closes = follows[:, first]
+    finishable = np.array(
+        [
+            [t < edo and s > 0 and count(rules, t, s, first) > 0 for s in range(top)]
+            for t in range(edo)
+        ]
+    )
+
+    totals = np.array([first + second])
+    lasts = np.array([second])
+    masks = np.array([1 | 1 << first | 1 << (first + second)], dtype="i8")
+    found = []
+    while len(totals):
+        extended = []
+        for s in rules.steps:
+            t = totals + s
+            ok = follows[lasts, s]
+            found.append(masks[ok & (t == edo) & closes[s]])
+            go = np.flatnonzero(ok & (t < edo))
+            go = go[finishable[t[go], s]]
+            extended.append((t[go], np.full(len(go), s), masks[go] | 1 << t[go]))
+        totals, lasts, masks = (np.concatenate(x) for x in zip(*extended))
+
+    # Put them in the order we'd find them trying smaller steps first,
+    # which is the order of their notes.
+    found = np.concatenate(found)
+    return found[np.argsort(-bit_reversed(found, edo), kind="stable")]
+
+
+def bit_reversed(masks, bits):
+    "Masks with the order of their lowest bits reversed."
+    reversed_masks = np.zeros_like(masks)
+    for b in range(bits):
+        reversed_masks |= ((masks >> b) & 1) << (bits - 1 - b)
+    return reversed_masks
+
+
+def scale_masks(rules=Rules(), processes=1):
+    """
+    Masks of all the valid scales, in the order they'd be found by
+    trying smaller steps first. With more than one process the
+    patterns are enumerated in parallel.
+    """
+    tasks = [(rules, p) for p in prefixes(rules)]
+    if processes > 1:
+        with Pool(processes) as pool:
+            parts = pool.starmap(enumerate_prefix, tasks)
+    else:
+        parts = [enumerate_prefix(*t) for t in tasks]
+    if not parts:
+        return np.zeros(0, dtype="i8")
+    return np.concatenate(parts)
+
+
+def notes_of(m, edo=12):
+    "The notes in a mask, in steps above the root."
+    return tuple(n for n in range(edo) if m >> n & 1)
+
+
+def scales(rules=Rules()):
+    "All the valid scales as tuples of steps above the root."
+    for m in scale_masks(rules):
+        yield notes_of(int(m), rules.edo)
+
+
+# The scales we have names for, by family: the scale the family is
+# named after and the names of its modes in order.
+families = [
+    (
+        "Major",
+        Scale.major,
+        (
+            "Ionian",
+            "Dorian",
+            "Phrygian",
+            "Lydian",
+            "Mixolydian",
+            "Aeolian",
+            "Locrian",
+        ),
+    ),
+    (
+        "Melodic minor",
+        (0, 2, 3, 5, 7, 9, 11),
+        (
+            "Melodic minor",
+            "Dorian ♭2",
+            "Lydian augmented",
+            "Lydian dominant",
+            "Mixolydian ♭6",
+            "Locrian ♮2",
+            "Altered",
+        ),
+    ),
+    (
+        "Harmonic minor",
+        (0, 2, 3, 5, 7, 8, 11),
+        (
+            "Harmonic minor",
+            "Locrian ♮6",
+            "Ionian ♯5",
+            "Dorian ♯4",
+            "Phrygian dominant",
+            "Lydian ♯2",
+            "Altered ♭♭7",
+        ),
+    ),
+    (
+        "Harmonic major",
+        (0, 2, 4, 5, 7, 8, 11),
+        (
+            "Harmonic major",
+            "Dorian ♭5",
+            "Phrygian ♭4",
+            "Lydian ♭3",
+            "Mixolydian ♭2",
+            "Lydian augmented ♯2",
+            "Locrian ♭♭7",
+        ),
+    ),
+    ("Whole tone", (0, 2, 4, 6, 8, 10), ("Whole tone",)),
+    (
+        "Diminished",
+        (0, 2, 3, 5, 6, 8, 9, 11),
+        ("Whole-half diminished", "Half-whole diminished"),
+    ),
+    ("Augmented", (0, 3, 4, 7, 8, 11), ("Augmented", "Inverse augmented")),
+]
+
+
+@dataclass(frozen=True)
+class CatalogScale:
+
+    """
+    A scale in the catalog. family is the name of the scale it is a
+    mode of and mode which mode of it it is, counting from 1.
+    """
+
+    notes: Tuple[int, ...]
+    mask: int
+    name: Optional[str] = None
+    family: Optional[str] = None
+    mode: int = 1
+    edo: int = 12
+
+    def scale(self, root=0):
+        return Scale(self.notes, root, self.edo)
+
+
+def rotate(m, k, edo=12):
+    "The mask m with every pitch class moved down k steps."
+    k %= edo
+    return ((m >> k) | (m << (edo - k))) & ((1 << edo) - 1)
+
+
+# Number of bits set in every byte.
+byte_popcount = np.array([bin(b).count("1") for b in range(256)], dtype="u1")
+
+
+def popcount(masks):
+    "Number of bits set in each of an array of masks."
+    masks = np.ascontiguousarray(masks, dtype="<i8")
+    return byte_popcount[masks.view("u1")].reshape(-1, 8).sum(axis=1)
+
+
+class Catalog:
+
+    """
+    An indexed collection of scales, kept as an array of masks. The
+    CatalogScales are only made as they're asked for so catalogs of
+    millions of scales are fine.
+    """
+
+    def __init__(self, masks, edo=12, families=families):
+        self.edo = edo
+        self.masks = np.asarray(masks, dtype="i8")
+        self.order = np.argsort(self.masks, kind="stable")
+        self.sorted_masks = self.masks[self.order]
+
+        self.names = {}
+        if edo == 12:
+            for family, parent, mode_names in families:
+                for n, name in enumerate(mode_names, 1):
+                    self.names[mask(mode(parent, n))] = (name, family, n)
+        self.by_name = {name: m for m, (name, _, _) in self.names.items()}
+
+    @classmethod
+    def generate(cls, rules=Rules(), processes=1):
+        return cls(scale_masks(rules, processes), rules.edo)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __getitem__(self, i):
+        m = int(self.masks[i])
+        return CatalogScale(
+            notes_of(m, self.edo), m, *self.names.get(m, (None, None, 1)), self.edo
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def index(self, m):
+        "Where the scale with mask m is in the catalog, or None."
+        i = np.searchsorted(self.sorted_masks, m)
+        if i < len(self) and self.sorted_masks[i] == m:
+            return int(self.order[i])
+        return None
+
+    def get(self, notes):
+        "The scale with exactly these notes, if we have one."
+        i = self.index(mask(notes, self.edo))
+        return None if i is None else self[i]
+
+    def named(self, name):
+        return self[self.index(self.by_name[name])]
+
+    def containing(self, notes):
+        "Scales that contain all of notes, relative to the scale's root."
+        m = mask(notes, self.edo)
+        return [self[i] for i in np.flatnonzero((self.masks & m) == m)]
+
+    def keys_containing(self, notes):
+        """
+        Every scale and key (pitch class of the root) in which notes all
+        belong to the scale, as (scale, key) pairs.
+        """
+        m = mask(notes, self.edo)
+        shifted = np.array([rotate(m, key, self.edo) for key in range(self.edo)])
+        found = (self.masks[:, None] & shifted) == shifted
+        return [(self[i], int(key)) for i, key in zip(*np.nonzero(found))]
+
+    def modes(self, scale):
+        "All the modes of scale, starting with itself."
+        return [self[self.index(rotate(scale.mask, n, self.edo))] for n in scale.notes]
+
+    def are_modes(self, a, b):
+        return b.mask in {rotate(a.mask, n, self.edo) for n in a.notes}
+
+    def nearest(self, notes, n=5):
+        """
+        The n scales closest to notes by Hamming distance, the number of
+        pitch classes in one and not the other, as (distance, scale)
+        pairs, closest first. Notes that are themselves a scale in the
+        catalog will find it at distance 0.
+        """
+        distance = popcount(self.masks ^ mask(notes, self.edo))
+        order = np.argsort(distance, kind="stable")[:n]
+        return [(int(distance[i]), self[i]) for i in order]
+
+
+catalog = Catalog.generate()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edo", type=int, default=12, help="Steps to the octave.")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--count", action="store_true", help="Only count the scales.")
+
+    args = parser.parse_args()
+
+    rules = Rules(args.edo)
+    if args.count:
+        print(sum(count(rules, sum(p), p[1], p[0]) for p in prefixes(rules)))
+    else:
+        scales = Catalog.generate(rules, args.processes)
+        for s in scales:
+            notes = " ".join(f"{x:2}" for x in s.notes)
+            print(f"{notes:24} {s.name or ''}")
@@ -1,7 +1,12 @@
-import random
-from collections import defaultdict
+import heapq
+import math
+import time
 from dataclasses import dataclass
 
+import numpy as np
+
+from eartraining.sampling import WeightTree
+
 
 class QuestionScheduler:
 
@@ -9,79 +14,98 @@ class QuestionScheduler:
     From a iterator of questions, keep track of which ones have been
     answered with a moving average of correct and incorrect answers.
     Add new questions to the pool when needed.
+
+    The weights questions are drawn with are kept in a WeightTree so
+    drawing and updating are O(log n) in the number of questions.
     """
 
-    def __init__(self, questions, decay):
+    def __init__(self, questions, decay, verbose=False):
         self.questions = iter(questions)
-        self.scores = defaultdict(float)
+        self.scores = {}
         self.decay = decay
         self.limit = 1 / (1 - decay)
+        self.verbose = verbose
+        self.pool = []
+        self.index = {}
+        self.weights = WeightTree()
+        self.unlearned = 0
 
     def draw(self):
 
         if self.needs_new_question():
             self.add_next_question()
 
-        pop = list(self.scores.keys())
-        weights = [(self.limit - self.scores[q]) ** 2 for q in pop]
+        if self.verbose:
+            self.print_weights()
+
+        return self.pool[self.weights.sample()]
 
+    def weight(self, q):
+        return (self.limit - self.scores[q]) ** 2
+
+    def print_weights(self):
         print("")
         print(f"{len(self.scores.keys())} current questions.")
         for a, b in sorted(
-            zip(weights, pop), key=lambda x: (x[0], x[1].label), reverse=True
+            zip(self.weights.weights, self.pool),
+            key=lambda x: (x[0], x[1].label),
+            reverse=True,
         ):
             print(f"{a:.4f} -> {b.label}")
 
-        return random.choices(pop, weights, k=1)[0]
-
     def options(self, expected):
         return expected.options(self.scores.keys())
 
     def update(self, got, expected):
         if got == expected:
-            self.scores[got] *= self.decay
-            self.scores[got] += 1
+            self.score(got, 1)
         else:
-            self.scores[got] *= self.decay
-            self.scores[got] -= 1
-            self.scores[expected] *= self.decay
-            self.scores[expected] -= 1
+            self.score(got, -1)
+            self.score(expected, -1)
+
+    def score(self, q, points):
+        before = self.scores[q] <= 0.0
+        self.scores[q] = self.scores[q] * self.decay + points
+        self.unlearned += (self.scores[q] <= 0.0) - before
+        self.weights[self.index[q]] = self.weight(q)
 
     def needs_new_question(self):
-        return all(s > 0.0 for s in self.scores.values())
+        return self.unlearned == 0
 
     def add_next_question(self):
         try:
             q = next(self.questions)
             print(f"Adding {q.label} {q}")
             self.scores[q] = 0.0
+            self.unlearned += 1
+            self.index[q] = self.weights.append(self.weight(q))
+            self.pool.append(q)
             return q
         except StopIteration:
             return None
 
 
-@dataclass
-class QuestionData:
-
-    score: float = 0.0
-    last_asked: int = 0
+def grown(array, size):
+    "array, or a copy at least twice as long if it can't hold size entries."
+    if size <= len(array):
+        return array
+    bigger = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    bigger[: len(array)] = array
+    return bigger
 
-    def weight(self, s):
-        base_weight = s.limit - self.score
-        age = s.questions_asked - self.last_asked
-        age_adjustment = s.age_weighting ** age
-        weight = base_weight * age_adjustment
-        return weight
 
-    def stats(self, s):
-        base_weight = s.limit - self.score
-        age = s.questions_asked - self.last_asked
-        age_adjustment = s.age_weighting ** age
-        weight = base_weight * age_adjustment
-        return f"weight {weight}. score: {self.score}; base_weight: {base_weight}; age: {age}; age_adjustment: {age_adjustment}"
+# How far, as a natural log, the global age multiplier can drift
+# before we fold it back into the stored weights. Kept small so the
+# stored weights stay close enough in size for the WeightTree to add
+# and subtract them precisely.
+max_log_multiplier = 10
 
-    def ok(self, threshold):
-        return self.score > threshold
+# The most, as a natural log, the age can multiply a stored weight by.
+# Questions that have never been asked count as asked at the start so
+# their ages go up without limit and would otherwise overflow. This is
+# still far more than any question that has been asked gets so new
+# questions keep coming first.
+max_log_age = 30
 
 
 class SetQuestionScheduler:
@@ -89,63 +113,364 @@ class SetQuestionScheduler:
     """
     Like QuestionScheduler but adds questions in sets rather than one
     at a time.
+
+    Questions are numbered in the order they're added and their scores
+    and when they were last asked are kept in arrays by that number.
+
+    A question's weight is its base weight times age_weighting to the
+    power of how many questions have been asked since it was. The age
+    part grows by the same factor for every question on every draw so
+    rather than touching every weight we store each one relative to an
+    epoch, base_weight * age_weighting ** (epoch - last_asked). The
+    true weights are all that times the same global multiplier,
+    age_weighting ** (questions_asked - epoch), which doesn't change
+    which question gets drawn. When the multiplier gets too big or
+    small to be comfortable we move the epoch up and recompute the
+    stored weights.
+
+    We also keep count of how many questions are at or below the
+    threshold so we know when to add more without looking at them all.
     """
 
-    def __init__(self, question_sets, score_decay, age_weighting, correct_required):
+    def __init__(
+        self,
+        question_sets,
+        score_decay,
+        age_weighting,
+        correct_required,
+        verbose=False,
+    ):
         self.question_sets = iter(question_sets)
-        self.questions = dict()
         self.score_decay = score_decay
         self.age_weighting = age_weighting
         self.limit = 1 / (1 - score_decay)
         self.threshold = self.limit - (score_decay ** (correct_required - 1))
         self.questions_asked = 0
+        self.verbose = verbose
+        self.pool = []
+        self.index = {}
+        self.scores = np.zeros(16)
+        self.last_asked = np.zeros(16, dtype="i8")
+        self.below = 0
+        self.weights = WeightTree()
+        self.epoch = 0
+        if age_weighting > 1:
+            self.max_age = max_log_age / math.log(age_weighting)
+        else:
+            self.max_age = math.inf
 
     def draw(self):
 
         if self.needs_new_questions():
             self.add_questions()
 
-        qs = list(self.questions.keys())
-        weights = [self.questions[q].weight(self) for q in qs]
+        if self.verbose:
+            self.print_weights()
 
+        self.questions_asked += 1
+        if abs(self.log_multiplier()) > max_log_multiplier:
+            self.renormalize()
+
+        i = self.weights.sample()
+        self.last_asked[i] = self.questions_asked
+        self.reweight(i)
+        return self.pool[i]
+
+    def log_multiplier(self):
+        "Natural log of the global age multiplier."
+        age = self.questions_asked - self.epoch
+        return age * math.log(self.age_weighting) if age else 0.0
+
+    def stored_weights(self):
+        n = len(self.pool)
+        age = np.minimum(self.epoch - self.last_asked[:n], self.max_age)
+        return (self.limit - self.scores[:n]) * self.age_weighting ** age
+
+    def reweight(self, i):
+        age = min(self.epoch - int(self.last_asked[i]), self.max_age)
+        base_weight = self.limit - float(self.scores[i])
+        self.weights[i] = base_weight * self.age_weighting ** age
+
+    def renormalize(self):
+        "Move the epoch up to now, recomputing every stored weight in O(n)."
+        self.epoch = self.questions_asked
+        self.weights.rebuild(self.stored_weights().tolist())
+
+    def print_weights(self):
+        n = len(self.pool)
+        base_weights = self.limit - self.scores[:n]
+        ages = self.questions_asked - self.last_asked[:n]
+        age_adjustments = self.age_weighting ** ages.astype("f8")
+        weights = base_weights * age_adjustments
         print("")
-        print(f"{len(qs)} current questions.")
-        for a, b in sorted(
-            zip(weights, qs), key=lambda x: (x[0], x[1].label), reverse=True
+        print(f"{n} current questions.")
+        for i in sorted(
+            range(n), key=lambda i: (weights[i], self.pool[i].label), reverse=True
         ):
-            qd = self.questions[b]
-            print(f"{a:.4f} -> {b.label} {qd.stats(self)}")
-
-        self.questions_asked += 1
-        q = random.choices(qs, weights, k=1)[0]
-        self.questions[q].last_asked = self.questions_asked
-        return q
+            print(
+                f"{weights[i]:.4f} -> {self.pool[i].label} weight {weights[i]}. "
+                f"score: {self.scores[i]}; base_weight: {base_weights[i]}; "
+                f"age: {ages[i]}; age_adjustment: {age_adjustments[i]}"
+            )
 
     def options(self, expected):
-        return expected.options(self.questions.keys())
+        return expected.options(self.pool)
 
     def update(self, got, expected):
         if got == expected:
-            self.questions[got].score *= self.score_decay
-            self.questions[got].score += 1
+            self.score(self.index[got], 1)
         else:
-            self.questions[got].score *= self.score_decay
-            self.questions[got].score -= 1
-            self.questions[expected].score *= self.score_decay
-            self.questions[expected].score -= 1
+            self.score(self.index[got], -1)
+            self.score(self.index[expected], -1)
+
+    def score(self, i, points):
+        before = self.scores[i] <= self.threshold
+        self.scores[i] = self.scores[i] * self.score_decay + points
+        self.below += int(self.scores[i] <= self.threshold) - int(before)
+        self.reweight(i)
+
+    def update_many(self, answers):
+        """
+        Apply a batch of (got, expected) answers in order, as if update
+        had been called for each one. No new questions are added part
+        way through.
+        """
+        pairs = np.array(
+            [(self.index[got], self.index[expected]) for got, expected in answers],
+            dtype="i8",
+        ).reshape(-1, 2)
+        self.score_many(pairs[:, 0], pairs[:, 1])
+
+    def score_many(self, got, expected):
+        """
+        update_many for arrays of question numbers, all with array
+        operations. A question scored k times ends up with its old score
+        times score_decay ** k plus each of its points times score_decay
+        to the power of how many times it was scored after that.
+        """
+        got = np.asarray(got, dtype="i8")
+        expected = np.asarray(expected, dtype="i8")
+        correct = got == expected
+        wrong = np.flatnonzero(~correct)
+
+        # One entry per score change, in the order update would make them.
+        ids = np.concatenate((got, expected[wrong]))
+        points = np.concatenate(
+            (np.where(correct, 1.0, -1.0), np.full(len(wrong), -1.0))
+        )
+        order = np.concatenate((np.arange(len(got)), wrong))
+        entries = np.lexsort((order, ids))
+        ids, points = ids[entries], points[entries]
+
+        # How many times each question is scored after each entry.
+        n = len(self.pool)
+        times = np.bincount(ids, minlength=n)
+        ends = np.cumsum(times)
+        later = ends[ids] - 1 - np.arange(len(ids))
+
+        touched = np.flatnonzero(times)
+        before = np.count_nonzero(self.scores[touched] <= self.threshold)
+        self.scores[:n] *= self.score_decay ** times.astype("f8")
+        self.scores[:n] += np.bincount(
+            ids, weights=points * self.score_decay ** later.astype("f8"), minlength=n
+        )
+        self.below += int(
+            np.count_nonzero(self.scores[touched] <= self.threshold) - before
+        )
+        self.weights.rebuild(self.stored_weights().tolist())
+
+    def state(self):
+        "The scores and ages of the questions, for eartraining.progress."
+        n = len(self.pool)
+        return {
+            "questions": n,
+            "questions_asked": self.questions_asked,
+            "scores": self.scores[:n].tolist(),
+            "last_asked": self.last_asked[:n].tolist(),
+        }
+
+    def restore(self, state):
+        """
+        Go back to a saved state, taking question sets from our iterator
+        until we have as many questions as there were.
+        """
+        n = state["questions"]
+        self.add_questions_until(n)
+        self.scores[:n] = state["scores"]
+        self.last_asked[:n] = state["last_asked"]
+        self.questions_asked = self.epoch = state["questions_asked"]
+        self.below = int(np.count_nonzero(self.scores[:n] <= self.threshold))
+        self.weights.rebuild(self.stored_weights().tolist())
+
+    def labels(self):
+        return [q.label for q in self.pool]
+
+    def replay(self, answers):
+        """
+        Apply logged (question, chosen) pairs of question numbers as if
+        each question had been drawn and then answered.
+        """
+        pairs = np.array(answers, dtype="i8").reshape(-1, 2)
+        if len(pairs):
+            self.add_questions_until(int(pairs.max()) + 1)
+        expected, got = pairs[:, 0], pairs[:, 1]
+        asked = self.questions_asked + 1 + np.arange(len(pairs))
+        np.maximum.at(self.last_asked, expected, asked)
+        self.questions_asked = self.epoch = self.questions_asked + len(pairs)
+        self.score_many(got, expected)
 
     def needs_new_questions(self):
         """
         When all the current questions' scores are above our threshold,
         then we add in the next set of questions.
         """
-        return all(q.ok(self.threshold) for q in self.questions.values())
+        return self.below == 0
 
     def add_questions(self):
         try:
             qs = next(self.question_sets)
             for q in qs:
                 print(f"Adding {q.label} {q}")
-                self.questions[q] = QuestionData()
+                i = len(self.pool)
+                self.scores = grown(self.scores, i + 1)
+                self.last_asked = grown(self.last_asked, i + 1)
+                self.scores[i] = 0.0
+                self.last_asked[i] = 0
+                self.below += 0.0 <= self.threshold
+                self.index[q] = i
+                self.pool.append(q)
+                self.weights.append(0.0)
+                self.reweight(i)
+        except StopIteration:
+            return None
+
+    def add_questions_until(self, n):
+        while len(self.pool) < n:
+            before = len(self.pool)
+            self.add_questions()
+            if len(self.pool) == before:
+                raise ValueError(f"Ran out of questions before getting to {n}.")
+
+
+day = 24 * 60 * 60
+
+
+@dataclass
+class Card:
+
+    "Where a question is in its spaced repetition schedule."
+
+    due: float
+    interval: float = 0.0
+    repetitions: int = 0
+    ease: float = 2.5
+
+
+class SpacedRepetitionScheduler:
+
+    """
+    A scheduler for large sets of questions, like progressions in every
+    key or chords in many voicings, that asks each question again just
+    before we'd forget it, using the SM-2 algorithm. Each right answer
+    pushes the question further out and each wrong one brings it back
+    after lapse_interval seconds. A wrong answer counts against both the
+    question and the one we mistook it for.
+
+    The questions are kept in a heap by when they're next due, with
+    entries left behind when a question is rescheduled skipped as they
+    come to the top, so finding what's due is O(log n). When nothing is
+    due we start on a new question and when there are no more new ones
+    we ask whatever is due soonest.
+
+    clock gives the current time in seconds and can be replaced to
+    simulate the passing of days.
+    """
+
+    def __init__(
+        self,
+        questions,
+        intervals=(day, 6 * day),
+        lapse_interval=60,
+        clock=time.time,
+    ):
+        self.questions = iter(questions)
+        self.intervals = intervals
+        self.lapse_interval = lapse_interval
+        self.clock = clock
+        self.pool = []
+        self.index = {}
+        self.cards = []
+        self.heap = []
+        # Start on the first question now so there's always something
+        # to draw.
+        if self.add_next_question() is None:
+            raise ValueError("SpacedRepetitionScheduler needs at least one question.")
+
+    def draw(self):
+        self.skip_stale()
+        if not self.heap or self.heap[0][0] > self.clock():
+            q = self.add_next_question()
+            if q is not None:
+                return q
+        return self.pool[self.heap[0][1]]
+
+    def next_due(self):
+        "When the next question is due, in the clock's seconds."
+        self.skip_stale()
+        return self.heap[0][0]
+
+    def options(self, expected):
+        return expected.options(self.pool)
+
+    def update(self, got, expected):
+        if got == expected:
+            self.grade(expected, 4)
+        else:
+            self.grade(got, 1)
+            self.grade(expected, 1)
+
+    def grade(self, q, quality):
+        """
+        Reschedule q after an answer of the given quality, from 0 for
+        a complete blank to 5 for a perfect answer, as in SM-2.
+        """
+        i = self.index[q]
+        card = self.cards[i]
+        if quality >= 3:
+            if card.repetitions < len(self.intervals):
+                card.interval = self.intervals[card.repetitions]
+            else:
+                card.interval *= card.ease
+            card.repetitions += 1
+        else:
+            card.interval = self.lapse_interval
+            card.repetitions = 0
+        card.ease = max(
+            1.3, card.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        )
+        self.schedule(i, self.clock() + card.interval)
+
+    def schedule(self, i, due):
+        self.cards[i].due = due
+        heapq.heappush(self.heap, (due, i))
+        # Don't let rescheduled entries pile up.
+        if len(self.heap) > 2 * len(self.cards) + 16:
+            self.heap = [(c.due, i) for i, c in enumerate(self.cards)]
+            heapq.heapify(self.heap)
+
+    def skip_stale(self):
+        "Pop entries for questions that have since been rescheduled."
+        while self.heap and self.cards[self.heap[0][1]].due != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def add_next_question(self):
+        try:
+            q = next(self.questions)
         except StopIteration:
             return None
+        i = len(self.pool)
+        self.index[q] = i
+        self.pool.append(q)
+        self.cards.append(Card(0.0))
+        self.schedule(i, self.clock())
+        return q
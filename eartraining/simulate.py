@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+"""
+Simulate learners using the schedulers and progressive quizzes to
+compare how quickly different strategies and parameters get them to
+mastery.
+
+The questions are the kinds of chord in eartraining.pcsets. Each
+simulated learner picks up each chord at their own rate, forgets
+chords they haven't heard in a while, more slowly the more they've
+practiced them, and when they don't know the answer mistake a chord
+for ones with a lot of the same notes. A learner has mastered the
+chords when they know all of them with at least the target
+probability.
+
+Every combination of parameters in a strategy's grid is run for a
+number of learners, spread over a pool of processes, and we report
+the median number of answers to mastery and how many answers a second
+were simulated.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+import numpy as np
+
+from eartraining.pcsets import chord_kinds
+from eartraining.pcsets import mask
+from eartraining.progressive import FixedQuiz
+from eartraining.progressive import PlusMinusProgressiveQuiz
+from eartraining.progressive import ProgressiveQuiz
+from eartraining.scales import popcount
+from eartraining.scheduler import SetQuestionScheduler
+from eartraining.scheduler import SpacedRepetitionScheduler
+
+# Simulated seconds per answer.
+seconds_per_answer = 5
+
+
+@dataclass(frozen=True)
+class SimQuestion:
+
+    "A question, or answer, standing for the chord kind chord_kinds[idx]."
+
+    idx: int
+
+    @property
+    def label(self):
+        return chord_kinds[self.idx].name
+
+    def options(self, questions):
+        return list(questions)
+
+    def align(self, other):
+        return other
+
+
+@dataclass(frozen=True)
+class SimTemplate:
+
+    idx: int
+
+    @property
+    def label(self):
+        return chord_kinds[self.idx].name
+
+    def instantiate(self, idx):
+        return SimQuestion(idx)
+
+
+def similarity(n):
+    "How many notes each pair of the first n chord kinds have in common."
+    masks = np.array([mask(k.tones) for k in chord_kinds[:n]], dtype="i8")
+    return popcount(masks[:, None] & masks[None, :]).reshape(n, n)
+
+
+class Learner:
+
+    """
+    A learner who knows question q with probability
+
+        (1 - exp(-practice[q] / rates[q])) * exp(-age / (stability * practice[q]))
+
+    where age is the time since they last heard it. If they don't know
+    the answer they guess among the options, favouring ones similar to
+    the question by a factor of confusion for each note in common.
+    """
+
+    def __init__(self, n, seed, stability=300, confusion=3.0):
+        self.rng = np.random.default_rng(seed)
+        self.rates = self.rng.lognormal(np.log(4), 0.5, n)
+        self.stability = stability
+        self.confusion = confusion ** similarity(n)
+        self.practice = np.zeros(n)
+        self.heard = np.zeros(n)
+
+    def knows(self, now, q=slice(None)):
+        "The probability of knowing question q, or each question, now."
+        practice = self.practice[q]
+        learned = 1 - np.exp(-practice / self.rates[q])
+        age = now - self.heard[q]
+        return learned * np.exp(-age / (self.stability * np.maximum(practice, 1)))
+
+    def answer(self, question, options, now):
+        q = question.idx
+        if self.rng.random() < self.knows(now, q):
+            chosen = question
+        else:
+            weights = self.confusion[q, [o.idx for o in options]]
+            chosen = options[self.rng.choice(len(options), p=weights / weights.sum())]
+        # Either way they hear the right answer.
+        self.practice[q] += 1
+        self.heard[q] = now
+        return chosen
+
+
+def scheduler_answers(scheduler, learner, clock):
+    "Ask the learner questions drawn from a scheduler."
+    while True:
+        q = scheduler.draw()
+        got = learner.answer(q, scheduler.options(q), clock[0])
+        scheduler.update(got, q)
+        yield
+
+
+def quiz_answers(quiz, learner, clock):
+    "Ask the learner questions from a quiz, each until they get it right."
+    while True:
+        question, choices = quiz.make_questions(quiz.make_choices())
+        while True:
+            got = learner.answer(question, choices, clock[0])
+            quiz.update(got, question)
+            yield
+            if got.idx == question.idx:
+                break
+
+
+def args_forever():
+    while True:
+        yield ()
+
+
+def strategy(name, params, n, clock):
+    """
+    The function that asks a learner questions for a strategy with the
+    given parameters and the scheduler or quiz it gets them from.
+    """
+    questions = [SimQuestion(i) for i in range(n)]
+    templates = [SimTemplate(i) for i in range(n)]
+    if name == "set":
+        sets = (questions[i : i + 2] for i in range(0, n, 2))
+        return scheduler_answers, SetQuestionScheduler(sets, **params)
+    if name == "srs":
+        return scheduler_answers, SpacedRepetitionScheduler(
+            questions, clock=lambda: clock[0], **params
+        )
+    if name == "fixed":
+        return quiz_answers, FixedQuiz(templates, args_forever())
+    if name == "progressive":
+        return quiz_answers, ProgressiveQuiz(templates, args_forever(), **params)
+    if name == "plusminus":
+        return quiz_answers, PlusMinusProgressiveQuiz(
+            templates, args_forever(), **params
+        )
+    raise ValueError(f"No strategy called {name}.")
+
+
+grids = {
+    "set": [
+        {"score_decay": d, "age_weighting": a, "correct_required": c}
+        for d, a, c in itertools.product((0.7, 0.8, 0.9), (1.0, 1.05, 1.1), (2, 3, 4))
+    ],
+    "srs": [
+        {"intervals": (i, 6 * i), "lapse_interval": lapse}
+        for i, lapse in itertools.product((300, 3600), (30, 120))
+    ],
+    "fixed": [{}],
+    "progressive": [{"score_threshold": t} for t in (2, 3, 4, 5)],
+    "plusminus": [{"score_threshold": t} for t in (2, 3, 4, 5)],
+}
+
+
+def simulate(name, params, n, seed, target, limit):
+    """
+    Run one learner against a strategy until they've mastered all n
+    questions or given limit answers. Returns the number of answers,
+    or None if they didn't get there, and the wall-clock seconds taken.
+    """
+    random.seed(seed)
+    clock = [0.0]
+    learner = Learner(n, seed)
+    answers, source = strategy(name, params, n, clock)
+    start = time.perf_counter()
+    mastered = None
+    # The schedulers and quizzes print as they go.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for count, _ in enumerate(answers(source, learner, clock), 1):
+            clock[0] += seconds_per_answer
+            if count % n == 0 and learner.knows(clock[0]).min() >= target:
+                mastered = count
+                break
+            if count >= limit:
+                break
+    return mastered, count, time.perf_counter() - start
+
+
+def report(name, params, results):
+    mastered = [m for m, _, _ in results if m is not None]
+    answers = sum(c for _, c, _ in results)
+    seconds = sum(s for _, _, s in results)
+    median = f"{np.median(mastered):8.0f}" if mastered else "       -"
+    print(
+        f"{name:12} {median} {len(mastered):3}/{len(results):<3}"
+        f" {answers / seconds:10,.0f}/s  {params}"
+    )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "strategies", nargs="*", default=list(grids), help="Strategies to run."
+    )
+    parser.add_argument("--questions", type=int, default=12, help="Chord kinds.")
+    parser.add_argument("--learners", type=int, default=20, help="Learners each.")
+    parser.add_argument("--target", type=float, default=0.9, help="Mastery.")
+    parser.add_argument("--limit", type=int, default=20000, help="Most answers.")
+    parser.add_argument("--processes", type=int, default=None, help="Processes.")
+
+    args = parser.parse_args()
+
+    tasks = [
+        (name, params, args.questions, seed, args.target, args.limit)
+        for name in args.strategies
+        for params in grids[name]
+        for seed in range(args.learners)
+    ]
+    with Pool(args.processes) as pool:
+        results = pool.starmap(simulate, tasks)
+
+    print(f"{'strategy':12} {'median':>8} {'mastered':>7}  {'answers':>10}")
+    for i in range(0, len(tasks), args.learners):
+        name, params = tasks[i][:2]
+        report(name, params, results[i : i + args.learners])
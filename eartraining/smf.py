@@ -0,0 +1,288 @@
+"""
+Reading and writing Standard MIDI Files.
+
+Rendered events can be written out as a format 0 or format 1 file and
+read back either as events, ready to play, or as a tree of Sequences
+and Parallels. Event times are converted to ticks with a TempoMap and
+there's a tempo event at each change so a file written with the tempo
+the events were rendered at plays back at the same speed. Files with
+tempo changes are read with a TempoMap too.
+"""
+
+import struct
+from dataclasses import dataclass
+from dataclasses import field
+from fractions import Fraction
+
+import numpy as np
+
+from eartraining.midi import OFF
+from eartraining.midi import ON
+from eartraining.midi import EventArray
+from eartraining.midi import Note
+from eartraining.midi import Parallel
+from eartraining.midi import Rest
+from eartraining.midi import Sequence
+from eartraining.midi import event_dtype
+from eartraining.tempo import TempoMap
+
+default_ppq = 480
+
+end_of_track = b"\xff\x2f\x00"
+
+
+def varlen(n):
+    "Encode n as a MIDI variable length quantity."
+    if n < 0:
+        raise ValueError(f"Can't encode negative length {n}.")
+    out = [n & 0x7F]
+    n >>= 7
+    while n:
+        out.append(0x80 | (n & 0x7F))
+        n >>= 7
+    return bytes(reversed(out))
+
+
+def tempo_event(bpm):
+    return b"\xff\x51\x03" + (round(60_000_000 / bpm)).to_bytes(3, "big")
+
+
+#
+# Writing
+#
+
+
+def write(path, events, bpm, ppq=default_ppq, format=0, programs=None):
+    """
+    Write rendered events to a MIDI file. The events can be an
+    EventArray, a list, or a stream and are written as they are
+    generated so they have to be in time order. bpm should be the tempo
+    they were rendered at: a bpm, a list of (position, bpm) pairs, or a
+    TempoMap. programs is an optional dict from channel to the MIDI
+    program to set at the start.
+    """
+    tempo = TempoMap.of(bpm).with_ppq(ppq)
+    changes = [
+        (tick, tempo_event(bpm))
+        for tick, bpm in zip(tempo.ticks.tolist(), tempo.bpms.tolist())
+    ]
+    setup = b"".join(
+        b"\x00" + bytes([0xC0 | channel, program])
+        for channel, program in (programs or {}).items()
+    )
+    with open(path, "wb") as f:
+        f.write(b"MThd" + struct.pack(">IHHH", 6, format, 1 + format, ppq))
+        if format == 0:
+            write_track(f, setup, events, tempo, changes)
+        elif format == 1:
+            write_track(f, b"", [], tempo, changes)
+            write_track(f, setup, events, tempo)
+        else:
+            raise ValueError(f"Can't write format {format} files.")
+
+
+def write_playable(path, playable, root, bpm, ppq=default_ppq, format=0, programs=None):
+    "Render a Playable straight into a MIDI file."
+    write(path, playable.stream(root, bpm), bpm, ppq, format, programs)
+
+
+def write_track(f, setup, events, tempo, meta=()):
+    """
+    Write one MTrk chunk starting with the already encoded setup
+    events, with event times converted to ticks through tempo. meta is
+    a list of (tick, encoded event) pairs, in order, to merge in. We
+    don't know how long the chunk is until we've written it so we go
+    back and fill in the length at the end.
+    """
+    f.write(b"MTrk\x00\x00\x00\x00")
+    start = f.tell()
+    meta = iter(meta)
+    pending = next(meta, None)
+
+    f.write(setup)
+    last = 0
+    for e in events:
+        tick = round(tempo.tick(e.time))
+        if tick < last:
+            raise ValueError(f"Event at {e.time}s is out of order.")
+        while pending is not None and pending[0] <= tick:
+            f.write(varlen(pending[0] - last) + pending[1])
+            last = pending[0]
+            pending = next(meta, None)
+        f.write(varlen(tick - last) + bytes(e.message()))
+        last = tick
+    while pending is not None:
+        f.write(varlen(pending[0] - last) + pending[1])
+        last = pending[0]
+        pending = next(meta, None)
+    f.write(b"\x00" + end_of_track)
+
+    end = f.tell()
+    f.seek(start - 4)
+    f.write(struct.pack(">I", end - start))
+    f.seek(end)
+
+
+#
+# Reading
+#
+
+
+@dataclass
+class Track:
+
+    """
+    The notes in one track as (tick, kind, note, velocity, channel)
+    tuples and any tempo changes as (tick, bpm) pairs.
+    """
+
+    messages: list
+    tempos: list = field(default_factory=list)
+
+
+def read_tracks(path):
+    "Read a MIDI file into a list of Tracks and the ticks per quarter note."
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if data[:4] != b"MThd":
+        raise ValueError(f"{path} is not a MIDI file.")
+    length, _, count, ppq = struct.unpack(">IHHH", data[4:14])
+    if ppq & 0x8000:
+        raise ValueError("SMPTE time division isn't supported.")
+
+    pos = 8 + length
+    tracks = []
+    for _ in range(count):
+        kind, length = struct.unpack(">4sI", data[pos : pos + 8])
+        pos += 8
+        if kind == b"MTrk":
+            tracks.append(parse_track(data[pos : pos + length]))
+        pos += length
+    return tracks, ppq
+
+
+def parse_track(data):
+    track = Track([])
+    pos = 0
+    tick = 0
+    status = None
+
+    def read_varlen():
+        nonlocal pos
+        n = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            n = (n << 7) | (b & 0x7F)
+            if not b & 0x80:
+                return n
+
+    while pos < len(data):
+        tick += read_varlen()
+        if data[pos] & 0x80:
+            status = data[pos]
+            pos += 1
+
+        if status == 0xFF:
+            kind = data[pos]
+            pos += 1
+            length = read_varlen()
+            if kind == 0x51:
+                bpm = 60_000_000 / int.from_bytes(data[pos : pos + 3], "big")
+                track.tempos.append((tick, bpm))
+            pos += length
+            status = None
+        elif status in (0xF0, 0xF7):
+            pos += read_varlen()
+            status = None
+        else:
+            kind, channel = status & 0xF0, status & 0x0F
+            size = 1 if kind in (0xC0, 0xD0) else 2
+            args = data[pos : pos + size]
+            pos += size
+            if kind == 0x90 and args[1] > 0:
+                track.messages.append((tick, ON, args[0], args[1], channel))
+            elif kind == 0x80 or kind == 0x90:
+                track.messages.append((tick, OFF, args[0], 0, channel))
+
+    return track
+
+
+def tempos(tracks, default=120):
+    "All the tempo changes in the file, starting at default if there are none."
+    changes = sorted(c for t in tracks for c in t.tempos)
+    return changes or [(0, default)]
+
+
+def read_events(path):
+    """
+    Read a MIDI file straight into an EventArray ready to play at the
+    file's tempo.
+    """
+    tracks, ppq = read_tracks(path)
+    records = [m for t in tracks for m in t.messages]
+    data = np.array(records, dtype=event_dtype)
+    data["time"] = TempoMap(tempos(tracks), ppq).seconds(data["time"])
+    return EventArray(data).sorted().without_overlaps()
+
+
+def read(path):
+    """
+    Read a MIDI file into a Playable and the bpm it should be played
+    at, or a list of (position, bpm) pairs if the tempo changes. Notes
+    are absolute MIDI notes so the Playable should be rendered with a
+    root of 0.
+    """
+    tracks, ppq = read_tracks(path)
+    whole_note = ppq * 4
+    playables = [track_playable(t, whole_note) for t in tracks if t.messages]
+    changes = tempos(tracks)
+    if len(changes) == 1:
+        bpm = changes[0][1]
+    else:
+        bpm = [(Fraction(tick, whole_note), bpm) for tick, bpm in changes]
+    if len(playables) == 1:
+        return playables[0], bpm
+    return Parallel(playables), bpm
+
+
+def track_playable(track, whole_note):
+    """
+    Split the notes in a track into as few monophonic voices as we can,
+    each a Sequence of Notes and Rests, played in Parallel.
+    """
+    voices = []
+    for start, end, note, velocity, channel in notes(track):
+        voice = next((v for v in voices if v[0] <= start), None)
+        if voice is None:
+            voice = [0, []]
+            voices.append(voice)
+        if start > voice[0]:
+            voice[1].append(Rest(Fraction(start - voice[0], whole_note)))
+        voice[1].append(
+            Note(note, Fraction(end - start, whole_note), velocity, channel)
+        )
+        voice[0] = end
+
+    sequences = [Sequence(children) for _, children in voices]
+    return sequences[0] if len(sequences) == 1 else Parallel(sequences)
+
+
+def notes(track):
+    """
+    Pair up the note ons and note offs into (start, end, note, velocity,
+    channel).
+    """
+    sounding = {}
+    result = []
+    for tick, kind, note, velocity, channel in sorted(
+        track.messages, key=lambda m: m[:2]
+    ):
+        key = (channel, note)
+        if kind == ON:
+            sounding.setdefault(key, []).append((tick, velocity))
+        elif sounding.get(key):
+            start, velocity = sounding[key].pop(0)
+            result.append((start, tick, note, velocity, channel))
+    return sorted(result, key=lambda n: (n[0], n[2], n[4]))
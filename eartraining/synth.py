@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""
+Offline software synthesizer. Turns rendered note on/note off events
+into audio with a simple additive piano-like tone and writes it out as
+a WAV file, so we can listen to things without a MIDI synth attached.
+
+Each note is synthesized as a whole with NumPy and mixed into the
+output buffer in one go. There's no randomness so rendering the same
+events always produces the same samples.
+"""
+
+import sys
+import wave
+
+import numpy as np
+
+from eartraining.midi import OFF
+from eartraining.midi import ON
+from eartraining.midi import EventArray
+
+sample_rate = 44100
+
+# Relative amplitudes of the partials. Higher partials die away faster.
+partials = 1 / np.arange(1, 9) ** 1.5
+
+# How much the partials are stretched above the harmonic series, like
+# a real piano string.
+inharmonicity = 0.0004
+
+attack = 0.005
+release = 0.25
+
+
+def frequency(note):
+    return 440 * 2 ** ((note - 69) / 12)
+
+
+def notes(events):
+    """
+    Pair up the note ons and note offs in events into (start, end,
+    note, velocity) rows.
+    """
+    if not isinstance(events, EventArray):
+        events = EventArray.from_events(events)
+    d = events.without_overlaps().data
+    d = d[np.lexsort((d["kind"], d["time"], d["note"], d["channel"]))]
+    ons = d[d["kind"] == ON]
+    offs = d[d["kind"] == OFF]
+    return ons["time"], offs["time"], ons["note"], ons["velocity"]
+
+
+def tone(note, velocity, duration, rate=sample_rate):
+    "Samples for one note held for duration seconds, including its release."
+    n = int((duration + release) * rate)
+    t = np.arange(n) / rate
+    k = np.arange(1, len(partials) + 1)[:, None]
+    f = frequency(note) * k * np.sqrt(1 + inharmonicity * k**2)
+    decay = np.exp(-t * (0.5 + k * frequency(note) / 500))
+    audible = (f < rate / 2) * partials[:, None]
+    samples = (audible * decay * np.sin(2 * np.pi * f * t)).sum(axis=0)
+
+    envelope = np.minimum(t / attack, 1.0)
+    envelope *= np.clip(1 - (t - duration) / release, 0, 1)
+    return samples * envelope * (velocity / 127)
+
+
+def synthesize(events, rate=sample_rate):
+    "Render events to an array of float samples."
+    starts, ends, pitches, velocities = notes(events)
+    length = int(((ends.max() if len(ends) else 0) + release) * rate) + 1
+    out = np.zeros(length)
+    for start, end, note, velocity in zip(starts, ends, pitches, velocities):
+        samples = tone(note, velocity, end - start, rate)
+        i = int(start * rate)
+        out[i : i + len(samples)] += samples[: length - i]
+    return out
+
+
+def write_wav(path, samples, rate=sample_rate):
+    "Write float samples to a 16-bit mono WAV file, normalizing the level."
+    peak = np.abs(samples).max() if len(samples) else 0
+    if peak > 0:
+        samples = samples * (0.9 / peak)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def render_wav(path, events, rate=sample_rate):
+    write_wav(path, synthesize(events, rate), rate)
+
+
+if __name__ == "__main__":
+
+    from eartraining.music import Scales
+    from eartraining.music import melody
+
+    s = Scales.major
+    scale = melody(s.one_octave + [12] + list(reversed(s.one_octave)))
+    render_wav(sys.argv[1], scale.rhythm(1 / 8).render(60, 120))
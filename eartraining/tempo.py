@@ -0,0 +1,103 @@
+"""
+The timeline Playables are rendered on.
+
+Playables are laid out on an integer timeline of ticks, ppq to the
+quarter note, so onsets are exact no matter how long a piece goes on
+and sorting events is an integer sort. Durations are converted to
+ticks one note at a time. ppq is divisible by 3 and 5 and a good run
+of powers of two so dotted values, triplets, and quintuplets down to
+very short notes all come out as whole numbers of ticks.
+
+A TempoMap then turns ticks into seconds, allowing for any number of
+tempo changes along the way.
+"""
+
+from bisect import bisect_right
+from fractions import Fraction
+
+import numpy as np
+
+ppq = 960
+
+whole_note = 4 * ppq
+
+
+def ticks(duration):
+    "The number of ticks in a duration in whole notes, to the nearest tick."
+    if isinstance(duration, Fraction):
+        # Plain integer arithmetic is a lot quicker than Fraction's.
+        n, d = duration.numerator * whole_note, duration.denominator
+        return (2 * n + d) // (2 * d)
+    return round(duration * whole_note)
+
+
+def exact(duration):
+    """
+    A duration as an exact Fraction, taking floats like 1/12 to be the
+    nearest fraction that fits the timeline.
+    """
+    return Fraction(duration).limit_denominator(whole_note)
+
+
+class TempoMap:
+
+    """
+    Tempo changes at given ticks. The first tempo applies from the
+    start even if it's given for a later tick.
+    """
+
+    def __init__(self, changes, ppq=ppq):
+        changes = sorted(changes)
+        self.ppq = ppq
+        self.ticks = np.array([0] + [t for t, _ in changes[1:]], dtype="i8")
+        self.bpms = np.array([bpm for _, bpm in changes], dtype="f8")
+        self.seconds_per_tick = 60 / (self.bpms * ppq)
+        self.starts = np.concatenate(
+            ([0.0], np.cumsum(np.diff(self.ticks) * self.seconds_per_tick[:-1]))
+        )
+        # Plain lists for converting one tick at a time.
+        self.segments = list(
+            zip(
+                self.ticks.tolist(),
+                self.starts.tolist(),
+                self.seconds_per_tick.tolist(),
+            )
+        )
+        self.start_times = self.starts.tolist()
+
+    @classmethod
+    def of(cls, tempo):
+        """
+        Make a TempoMap from a bpm, a list of (position, bpm) pairs with
+        positions in whole notes, or a TempoMap which is returned as is.
+        """
+        if isinstance(tempo, TempoMap):
+            return tempo
+        try:
+            return cls([(ticks(position), bpm) for position, bpm in tempo])
+        except TypeError:
+            return cls([(0, tempo)])
+
+    def with_ppq(self, ppq):
+        "The same tempo changes on a timeline with a different ppq."
+        changes = zip(self.ticks.tolist(), self.bpms.tolist())
+        return TempoMap([(round(t * ppq / self.ppq), bpm) for t, bpm in changes], ppq)
+
+    def seconds(self, t):
+        "Convert an array of ticks to seconds."
+        t = np.asarray(t)
+        i = np.searchsorted(self.ticks, t, side="right") - 1
+        return self.starts[i] + (t - self.ticks[i]) * self.seconds_per_tick[i]
+
+    def time(self, t):
+        "Convert a single tick to seconds."
+        tick, start, seconds_per_tick = self.segments[
+            bisect_right(self.segments, (t, float("inf"))) - 1
+        ]
+        return start + (t - tick) * seconds_per_tick
+
+    def tick(self, seconds):
+        "Convert a single time in seconds back to a, possibly fractional, tick."
+        i = max(bisect_right(self.start_times, seconds) - 1, 0)
+        tick, start, seconds_per_tick = self.segments[i]
+        return tick + (seconds - start) / seconds_per_tick
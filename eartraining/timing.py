@@ -0,0 +1,183 @@
+"""
+Accurate scheduling of MIDI events.
+
+Plain time.sleep() wakes up anywhere from a fraction of a millisecond
+to several milliseconds late depending on load, which is enough to
+smear the notes of a chord and make fast passages jitter. So we sleep
+until shortly before an event is due and then spin on the clock for
+the rest of the way.
+
+While a phrase is playing we also keep the garbage collector from
+running whenever it likes and, on Linux when we are allowed to, ask for
+real-time scheduling. Instead we collect the young generations
+ourselves when there's a long enough gap before the next event, so
+long or endless streams don't pile up garbage.
+
+Every event played is recorded in the module's JitterLog so we can
+see how well all this is working. It's a fixed size so playing a
+stream doesn't use more memory the longer it goes on.
+"""
+
+import gc
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+
+# How long before an event is due to stop sleeping and start spinning.
+spin_time = 0.002
+
+# Shortest wait, in seconds, we use to collect garbage while the
+# collector is kept out of the way.
+collect_gap = 0.02
+
+
+@dataclass
+class Emission:
+
+    "When an event was supposed to be emitted and when it actually was."
+
+    requested: float
+    achieved: float
+
+    @property
+    def lateness(self):
+        return self.achieved - self.requested
+
+
+class JitterLog:
+
+    """
+    Fixed-size ring buffer of the requested and achieved emission
+    times of the most recent events along with summary statistics of
+    how late they were.
+    """
+
+    def __init__(self, size=4096):
+        self.requested = np.zeros(size)
+        self.achieved = np.zeros(size)
+        self.count = 0
+
+    def record(self, requested, achieved):
+        i = self.count % len(self.requested)
+        self.requested[i] = requested
+        self.achieved[i] = achieved
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def lateness(self):
+        "Lateness, in seconds, of the events we still have."
+        n = min(self.count, len(self.requested))
+        return self.achieved[:n] - self.requested[:n]
+
+    def stats(self):
+        late = self.lateness()
+        if len(late) == 0:
+            return None
+        p50, p99 = np.percentile(late, [50, 99])
+        return p50, p99, late.max()
+
+    def histogram(self, bins):
+        "Counts of events whose lateness in seconds falls between the bins."
+        return np.histogram(self.lateness(), bins)
+
+    def summary(self):
+        if (stats := self.stats()) is None:
+            return "Lateness: no events played."
+        p50, p99, worst = (s * 1000 for s in stats)
+        n = len(self.lateness())
+        return f"Lateness: p50 {p50:.3f} ms; p99 {p99:.3f} ms; max {worst:.3f} ms ({n} events)"
+
+
+jitter = JitterLog()
+
+
+def wait_until(at, spin=spin_time):
+    """
+    Wait until time.perf_counter() reaches at, sleeping for as much of
+    the wait as we can and spinning for the last bit. Returns the time
+    we actually got there.
+    """
+    remaining = at - time.perf_counter()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while (now := time.perf_counter()) < at:
+        pass
+    return now
+
+
+def collect_if_idle(at):
+    """
+    Collect the young generations if the garbage collector has been
+    turned off and there's plenty of time before at.
+    """
+    if not gc.isenabled() and at - time.perf_counter() > collect_gap:
+        gc.collect(1)
+
+
+@contextmanager
+def realtime(priority=None):
+    """
+    Keep the garbage collector out of the way for the duration of the
+    body, other than when we call collect_if_idle(). If priority is given, also try to run with SCHED_FIFO at
+    that priority. That normally requires privileges so if we can't get
+    it we just carry on.
+    """
+    gc_enabled = gc.isenabled()
+    gc.freeze()
+    gc.disable()
+    restore = raise_priority(priority) if priority is not None else None
+    try:
+        yield
+    finally:
+        if restore is not None:
+            restore()
+        gc.unfreeze()
+        if gc_enabled:
+            gc.enable()
+
+
+def raise_priority(priority):
+    """
+    Switch the current process to SCHED_FIFO with the given priority.
+    Returns a function to put things back the way they were or None if
+    we couldn't change the scheduling policy.
+    """
+    try:
+        policy = os.sched_getscheduler(0)
+        param = os.sched_getparam(0)
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError):
+        return None
+
+    def restore():
+        try:
+            os.sched_setscheduler(0, policy, param)
+        except OSError:
+            pass
+
+    return restore
+
+
+def play(midi_out, events, spin=spin_time, priority=None, emissions=False):
+    """
+    Emit a sorted series of events at their times relative to now. If
+    emissions is true, returns a list of Emissions recording when each
+    event was supposed to go out and when it did, both relative to the
+    start. Otherwise they're only recorded in the jitter log.
+    """
+    kept = [] if emissions else None
+    with realtime(priority):
+        t_zero = time.perf_counter()
+        for e in events:
+            collect_if_idle(t_zero + e.time)
+            achieved = wait_until(t_zero + e.time, spin)
+            e.emit(midi_out)
+            jitter.record(e.time, achieved - t_zero)
+            if emissions:
+                kept.append(Emission(e.time, achieved - t_zero))
+    return kept
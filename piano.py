@@ -3,9 +3,9 @@
 "Trivial computer keyboard based piano keyboard."
 
 import pygame
-import pygame.midi
 
 from eartraining import keyboard
+from eartraining.backends import open_output
 from eartraining.ui import is_quit
 
 if __name__ == "__main__":
@@ -13,10 +13,8 @@ if __name__ == "__main__":
     start_note = 60
 
     pygame.init()
-    pygame.midi.init()
 
-    port = pygame.midi.get_default_output_id()
-    midi_out = pygame.midi.Output(port, 0)
+    backend, midi_out = open_output()
 
     try:
         midi_out.set_instrument(0)
@@ -43,4 +41,4 @@ if __name__ == "__main__":
                         on_notes.remove(note)
 
     finally:
-        pygame.midi.quit()
+        backend.close()
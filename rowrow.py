@@ -4,10 +4,11 @@
 
 
 import pygame
-import pygame.midi
 
+from eartraining.backends import open_output
 from eartraining.midi import Rest
 from eartraining.midi import play
+from eartraining.midi import voice_channels
 from eartraining.music import dotted
 from eartraining.music import melody
 from eartraining.music import triplet
@@ -46,20 +47,17 @@ def run():
         | (Rest(1) + m)
         | (Rest(2) + m.transpose(-12))
         | (Rest(3) + m.transpose(-24))
-    )
+    ).on_channels()
 
     pygame.init()
-    pygame.midi.init()
-
-    port = pygame.midi.get_default_output_id()
 
-    midi_out = pygame.midi.Output(port, 0)
+    backend, midi_out = open_output()
 
     try:
-        midi_out.set_instrument(0)
-        play(midi_out, round.render(60, 120))
+        programs = {c: 0 for c in voice_channels[: len(round.children)]}
+        play(midi_out, round.stream(60, 120), programs=programs)
     finally:
-        pygame.midi.quit()
+        backend.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+import pygame.midi
+import pytest
+
+from eartraining.backends import LoopbackOutput
+from eartraining.backends import NullOutput
+from eartraining.backends import RecordingOutput
+from eartraining.backends import midi_time
+from eartraining.backends import open_output
+
+
+@pytest.fixture
+def no_device(monkeypatch):
+    "Make PortMidi find no output device."
+    monkeypatch.setattr(pygame.midi, "init", lambda: None)
+    monkeypatch.setattr(pygame.midi, "quit", lambda: None)
+    monkeypatch.setattr(pygame.midi, "get_default_output_id", lambda: -1)
+
+
+def test_falls_back_to_null(no_device, monkeypatch, capsys):
+    monkeypatch.delenv("EARTRAINING_MIDI", raising=False)
+    backend, out = open_output()
+    assert isinstance(out, NullOutput)
+    assert "null" in capsys.readouterr().out
+    out.note_on(60, 100)
+    backend.close()
+
+
+def test_named_backend(monkeypatch):
+    monkeypatch.setenv("EARTRAINING_MIDI", "record")
+    backend, out = open_output()
+    assert isinstance(out, RecordingOutput)
+    backend.close()
+
+    backend, out = open_output(name="loopback")
+    assert isinstance(out, LoopbackOutput)
+    backend.close()
+
+
+def test_unknown_backend():
+    with pytest.raises(KeyError):
+        open_output(name="nonesuch")
+
+
+def test_recording():
+    out = RecordingOutput(capacity=2)
+    out.note_on(60, 100, 3)
+    out.note_off(60, channel=3)
+    out.set_instrument(5)
+    out.write([[[0x90, 62, 90], out.ms_zero + 250]])
+    messages = out.messages()
+    assert [tuple(m)[1:] for m in messages] == [
+        (0x93, 60, 100),
+        (0x83, 60, 0),
+        (0xC0, 5, 0),
+        (0x90, 62, 90),
+    ]
+    assert list(messages["time"]) == sorted(messages["time"])
+    assert messages["time"][-1] == 0.25
+
+
+def test_loopback():
+    out = LoopbackOutput()
+    assert not out.input.poll()
+    before = midi_time()
+    out.note_on(60, 100)
+    out.write([[[0x80, 60, 0], before + 100]])
+    assert out.input.poll()
+    (on, at), (off, off_at) = out.input.read(10)
+    assert on == [0x90, 60, 100, 0] and at >= before
+    assert (off, off_at) == ([0x80, 60, 0, 0], before + 100)
+    assert not out.input.poll()
+
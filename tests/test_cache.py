@@ -0,0 +1,33 @@
+from eartraining.cache import RenderCache
+from eartraining.cache import shape
+from eartraining.midi import Note
+from eartraining.midi import Parallel
+from eartraining.midi import Sequence
+
+
+def deep(depth, pitch=0):
+    playable = Note(pitch)
+    for i in range(depth):
+        playable = Sequence([Note(i % 12), playable]) if i % 2 else Parallel([playable])
+    return playable
+
+
+def test_shape_tells_structures_apart():
+    assert shape(Sequence([Note(0), Note(1)])) == shape(Sequence([Note(0), Note(1)]))
+    assert shape(Sequence([Note(0), Note(1)])) != shape(
+        Sequence([Note(0), Sequence([Note(1)])])
+    )
+    assert shape(Sequence([Note(0), Note(1)])) != shape(Parallel([Note(0), Note(1)]))
+
+
+def test_deep_trees():
+    cache = RenderCache()
+    playable = deep(5000)
+    assert shape(playable) == shape(deep(5000))
+    assert shape(playable) != shape(deep(5000, pitch=1))
+
+    events = cache.render(playable, 60, 120)
+    again = cache.render(deep(5000), 60, 120)
+    assert cache.stats.hits == 1
+    assert (events.data == again.data).all()
+    assert (events.data == playable.render(60, 120).data).all()
@@ -0,0 +1,86 @@
+import pytest
+
+from eartraining.edo import midi_pitches
+from eartraining.edo import no_bend
+from eartraining.edo import render
+from eartraining.midi import Note
+from eartraining.midi import NoteOff
+from eartraining.midi import NoteOn
+from eartraining.midi import Parallel
+from eartraining.midi import PitchBend
+from eartraining.midi import Sequence
+
+
+def notes_only(events):
+    return [
+        (round(e.time, 9), type(e).__name__, e.note)
+        for e in events
+        if not isinstance(e, PitchBend)
+    ]
+
+
+def test_twelve_edo_matches_render():
+    playable = Sequence(
+        [
+            Parallel([Note(0), Note(4), Note(7)]),
+            Parallel([Note(2, 1 / 2), Note(11, channel=1)]),
+            Sequence([Note(n, 1 / 8) for n in (7, 5, 4, 2, 0)]),
+        ]
+    )
+    events = render(playable, 12, 60, 120)
+    assert notes_only(events) == notes_only(playable.render(60, 120))
+    assert all(e.value == no_bend for e in events if isinstance(e, PitchBend))
+
+
+@pytest.mark.parametrize(
+    "edo, step, note, bend",
+    [
+        (19, 0, 60, 8192),
+        # 12/19 of a semitone up is 7/19 of one below C#.
+        (19, 1, 61, 8192 - 1509),
+        (19, 3, 62, 8192 - 431),
+        (19, 19, 72, 8192),
+        (19, -1, 59, 8192 + 1509),
+        # 60/31 semitones is 2/31 of one below D.
+        (31, 5, 62, 8192 - 264),
+        (31, 18, 67, 8192 - 264 // 2),
+        (31, 31, 72, 8192),
+    ],
+)
+def test_midi_pitches(edo, step, note, bend):
+    notes, bends = midi_pitches([step], edo)
+    assert (int(notes[0]), int(bends[0])) == (note, bend)
+
+
+def test_bends_get_their_own_channels():
+    chord = Parallel([Note(0), Note(1), Note(19)])
+    events = render(chord, 19, 60, 120)
+
+    bends = {e.channel: e.value for e in events if isinstance(e, PitchBend)}
+    on = {e.note: e.channel for e in events if isinstance(e, NoteOn)}
+    off = {e.note: e.channel for e in events if isinstance(e, NoteOff)}
+    assert on == off
+    # Steps 0 and 19 are an octave apart so share a bend and a channel.
+    notes = midi_pitches([0, 1, 19], 19)[0].tolist()
+    assert on[notes[0]] != on[notes[1]]
+    assert on[notes[0]] == on[notes[2]]
+    assert len(bends) == 2
+    for step, note in zip([0, 1, 19], notes):
+        assert bends[on[note]] == midi_pitches([step], 19)[1][0]
+
+    # Each bend is sent before the first note that needs it.
+    for c in bends:
+        kinds = [type(e) for e in events if e.channel == c]
+        assert kinds[0] is PitchBend
+
+
+def test_bend_kept_for_later_notes():
+    events = render(Sequence([Note(6), Note(6), Note(37)]), 31, 60, 120)
+    assert sum(isinstance(e, PitchBend) for e in events) == 1
+    assert {e.channel for e in events} == {0}
+
+
+def test_too_many_bends():
+    chord = Parallel([Note(n) for n in range(1, 8)])
+    with pytest.raises(ValueError):
+        render(chord, 31, 60, 120, channels=[0, 1, 2])
@@ -0,0 +1,119 @@
+import itertools
+import random
+from fractions import Fraction
+
+import numpy as np
+
+from eartraining.midi import OFF
+from eartraining.midi import ON
+from eartraining.midi import EventArray
+from eartraining.midi import Note
+from eartraining.midi import NoteArray
+from eartraining.midi import Parallel
+from eartraining.midi import Rest
+from eartraining.midi import Sequence
+from eartraining.midi import event_dtype
+
+
+def random_playable(rng, depth):
+    k = rng.random()
+    if depth == 0 or k < 0.3:
+        duration = Fraction(rng.randrange(1, 5), 8)
+        leaf = rng.random()
+        if leaf < 0.6:
+            return Note(rng.randrange(12), duration, channel=rng.randrange(2))
+        if leaf < 0.8:
+            return Rest(duration)
+        return NoteArray.of([rng.randrange(12) for _ in range(rng.randrange(4))], 1 / 8)
+    children = [random_playable(rng, depth - 1) for _ in range(rng.randrange(4))]
+    return Sequence(children) if k < 0.65 else Parallel(children)
+
+
+def as_tuples(events):
+    return [(round(e.time, 9), type(e).__name__, e.note, e.channel) for e in events]
+
+
+def test_stream_matches_render():
+    tempo = [(0, 120), (1, 90)]
+    for seed in range(200):
+        playable = random_playable(random.Random(seed), 5)
+        assert as_tuples(playable.stream(60, tempo)) == as_tuples(
+            playable.render(60, tempo)
+        )
+
+
+def test_stream_deep_trees():
+    playable = Note(0)
+    for i in range(5000):
+        if i % 2:
+            playable = Sequence([Note(i % 12), playable])
+        else:
+            playable = Parallel([playable, Rest(1 / 8)])
+    assert as_tuples(playable.stream(60, 120)) == as_tuples(playable.render(60, 120))
+
+
+def test_stream_infinite_sequence():
+    playable = Sequence(Note(i % 12, 1 / 8) for i in itertools.count())
+    events = as_tuples(itertools.islice(playable.stream(60, 120), 4))
+    assert events == [
+        (0.0, "NoteOn", 60, 0),
+        (0.25, "NoteOff", 60, 0),
+        (0.25, "NoteOn", 61, 0),
+        (0.5, "NoteOff", 61, 0),
+    ]
+
+
+def test_render_golden():
+    phrase = Sequence(
+        [
+            Note(0, 1 / 4),
+            Rest(1 / 8),
+            Parallel([Note(4, 1 / 8, 90), Note(7, 1 / 4, channel=1)]),
+            Note(0, 1 / 8),
+        ]
+    )
+    assert phrase.render(60, 120).data.tolist() == [
+        (0.0, ON, 60, 100, 0),
+        (0.5, OFF, 60, 0, 0),
+        (0.75, ON, 64, 90, 0),
+        (0.75, ON, 67, 100, 1),
+        (1.0, OFF, 64, 0, 0),
+        (1.25, OFF, 67, 0, 1),
+        (1.25, ON, 60, 100, 0),
+        (1.5, OFF, 60, 0, 0),
+    ]
+
+
+def events(*records):
+    return EventArray(np.array(list(records), dtype=event_dtype))
+
+
+def test_without_overlaps():
+    # The same note sounding twice at once on one channel becomes one
+    # long note, while on separate channels they are left alone.
+    overlapping = events(
+        (0, ON, 60, 100, 0),
+        (1, ON, 60, 90, 0),
+        (1, ON, 60, 80, 1),
+        (2, OFF, 60, 0, 0),
+        (2, OFF, 60, 0, 1),
+        (3, OFF, 60, 0, 0),
+        (3, ON, 62, 100, 0),
+        (4, OFF, 62, 0, 0),
+    )
+    assert overlapping.without_overlaps().data.tolist() == [
+        (0, ON, 60, 100, 0),
+        (1, ON, 60, 80, 1),
+        (2, OFF, 60, 0, 1),
+        (3, OFF, 60, 0, 0),
+        (3, ON, 62, 100, 0),
+        (4, OFF, 62, 0, 0),
+    ]
+    assert len(events().without_overlaps()) == 0
+
+    # Rendering merges overlaps the same way.
+    merged = Sequence([Note(0, 1 / 4), Note(0, 1 / 4)]) | Note(0, 1 / 2)
+    assert merged.render(60, 120).data.tolist() == [
+        (0.0, ON, 60, 100, 0),
+        (1.0, OFF, 60, 0, 0),
+    ]
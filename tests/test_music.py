@@ -0,0 +1,29 @@
+import pytest
+
+from eartraining.music import Scale
+from eartraining.music import Scales
+
+
+def test_roman_numerals():
+    assert [Scales.major.roman(d) for d in Scales.major.degrees] == [
+        "I",
+        "ii",
+        "iii",
+        "IV",
+        "V",
+        "vi",
+        "vii°",
+    ]
+    assert Scales.minor.roman(1, 4) == "i⁷"
+
+
+@pytest.mark.parametrize("degree", [0, -1, 8])
+def test_roman_rejects_degrees_outside_the_scale(degree):
+    with pytest.raises(ValueError):
+        Scale(Scale.major).roman(degree)
+
+
+def test_roman_counts_degrees_of_the_scale():
+    assert Scales.pentatonic_major.roman(5) is None
+    with pytest.raises(ValueError):
+        Scales.pentatonic_major.roman(6)
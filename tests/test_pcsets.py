@@ -0,0 +1,62 @@
+import pytest
+
+from eartraining.music import Scales
+from eartraining.music import kind_of_triad
+from eartraining.pcsets import chord_kinds
+from eartraining.pcsets import identify
+from eartraining.pcsets import mask
+
+
+def voicing(kind, root, inversion):
+    "The chord's notes with tone number inversion in the bass."
+    bass = root + kind.tones[inversion] % 12
+    return [bass] + [
+        bass + (root + t - bass) % 12 for t in kind.tones if t != kind.tones[inversion]
+    ]
+
+
+@pytest.mark.parametrize("kind", chord_kinds, ids=lambda k: k.name)
+def test_every_inversion_and_transposition(kind):
+    for root in range(12):
+        for inversion in range(len(kind.tones)):
+            notes = voicing(kind, 48 + root, inversion)
+            chord = identify(notes)
+            assert chord is not None
+            assert chord.bass == notes[0] % 12
+            # Some sets have more than one name, so check the chord we
+            # got has the same notes. With the root in the bass it has
+            # to be the one we built.
+            assert mask(chord.root + t for t in chord.kind.tones) == mask(notes)
+            if inversion == 0:
+                assert (chord.kind, chord.root) == (kind, root)
+
+
+def test_ambiguous_sets_prefer_the_root_in_the_bass():
+    assert identify([60, 64, 67, 69]).label == "C6"
+    assert identify([57, 60, 64, 67]).label == "Am7"
+    # Otherwise the kind that comes first in chord_kinds wins.
+    assert identify([64, 67, 69, 72]).label == "Am7/E"
+
+
+def test_unknown_sets():
+    assert identify([60, 61, 62]) is None
+    assert identify([60, 61, 66, 67]) is None
+
+
+def test_mask_folds_octaves():
+    assert mask([0, 4, 7]) == 0b10010001
+    assert mask([0, 12, 24, 16, 31]) == mask([0, 4, 7])
+    assert mask([-12, -8]) == mask([0, 4])
+    assert mask([19, 20, 38], edo=19) == 0b11
+
+
+def test_kind_of_triad():
+    assert [kind_of_triad(Scales.major.triad(d)) for d in Scales.major.degrees] == [
+        "major",
+        "minor",
+        "minor",
+        "major",
+        "major",
+        "minor",
+        "diminished",
+    ]
@@ -0,0 +1,177 @@
+import os
+import time
+
+import pygame
+import pytest
+
+from eartraining import playback
+from eartraining.backends import RecordingOutput
+from eartraining.midi import NoteOff
+from eartraining.midi import NoteOn
+from eartraining.playback import Player
+
+
+@pytest.fixture(autouse=True)
+def events():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.event.clear()
+    yield
+    pygame.display.quit()
+
+
+class BatchRecorder(RecordingOutput):
+
+    "Also keeps each batch handed to write."
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def write(self, data):
+        self.batches.append(data)
+        super().write(data)
+
+
+@pytest.fixture
+def out():
+    return BatchRecorder()
+
+
+def wait_done(timeout=5):
+    "The next Player.DONE event."
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for event in pygame.event.get(Player.DONE):
+            return event
+        time.sleep(0.005)
+    raise AssertionError("Player never finished.")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def phrase(notes, step, length):
+    "Notes one after another step seconds apart, each lasting length."
+    events = []
+    for i, note in enumerate(notes):
+        events += [NoteOn(note, 100, i * step), NoteOff(note, i * step + length)]
+    return sorted(events, key=lambda e: e.time)
+
+
+def sent(out):
+    "(status, note) of everything recorded."
+    return [(int(m["status"]), int(m["data1"])) for m in out.messages()]
+
+
+def test_plays_phrase(out):
+    player = Player(out)
+    player.play(phrase([60, 62, 64], 0.02, 0.02))
+    assert not wait_done().cancelled
+    player.close()
+    assert sent(out) == [
+        (0x90, 60),
+        (0x80, 60),
+        (0x90, 62),
+        (0x80, 62),
+        (0x90, 64),
+        (0x80, 64),
+    ]
+    times = out.messages()["time"]
+    assert times[-1] - times[0] == pytest.approx(0.06, abs=0.02)
+
+
+def test_cancel_turns_notes_off(out):
+    player = Player(out)
+    player.play([NoteOn(60, 100, 0), NoteOn(64, 100, 0), NoteOff(60, 5)])
+    wait_for(lambda: out.count == 2)
+    started = time.perf_counter()
+    player.cancel()
+    assert wait_done().cancelled
+    assert time.perf_counter() - started < 1
+    player.close()
+    assert sent(out)[:2] == [(0x90, 60), (0x90, 64)]
+    assert sorted(sent(out)[2:]) == [(0x80, 60), (0x80, 64)]
+    assert not player.sounding
+
+
+def test_cancel_drops_queued_phrases(out):
+    player = Player(out)
+    player.play([NoteOn(60, 100, 0), NoteOff(60, 5)])
+    with player.queueing():
+        player.play(phrase([62], 0, 0.01))
+    wait_for(lambda: out.count == 1)
+    player.cancel()
+    assert wait_done().cancelled
+    player.close()
+    assert sent(out) == [(0x90, 60), (0x80, 60)]
+    assert not pygame.event.get(Player.DONE)
+
+
+def test_play_cuts_off_current_phrase(out):
+    player = Player(out)
+    player.play([NoteOn(60, 100, 0), NoteOff(60, 5)])
+    wait_for(lambda: out.count == 1)
+    player.play(phrase([62], 0, 0.01))
+    assert wait_done().cancelled
+    assert not wait_done().cancelled
+    player.close()
+    assert sent(out) == [(0x90, 60), (0x80, 60), (0x90, 62), (0x80, 62)]
+
+
+def test_queued_phrase_waits_its_turn(out):
+    player = Player(out)
+    player.play(phrase([60], 0, 0.05))
+    with player.queueing():
+        player.play(phrase([62], 0, 0.01))
+    assert not wait_done().cancelled
+    assert not wait_done().cancelled
+    player.close()
+    assert sent(out) == [(0x90, 60), (0x80, 60), (0x90, 62), (0x80, 62)]
+
+
+def test_latency_writes_timestamped_batches(out):
+    events = phrase(range(60, 70), 0.05, 0.04)
+    player = Player(out, latency=10)
+    player.play(events)
+    assert not wait_done().cancelled
+    player.close()
+
+    assert len(out.batches) > 1
+    assert sum(len(b) for b in out.batches) == len(events)
+    for batch in out.batches:
+        stamps = [at for _, at in batch]
+        assert stamps == sorted(stamps)
+        assert stamps[-1] - stamps[0] <= playback.lookahead * 1000
+    # Times are PortMidi's to keep so they come out exactly as asked.
+    times = out.messages()["time"]
+    assert times - times[0] == pytest.approx([e.time for e in events], abs=0.001)
+    assert sent(out) == [(e.message()[0], e.note) for e in events]
+
+
+def test_batches_are_limited(out, monkeypatch):
+    monkeypatch.setattr(playback, "max_write", 4)
+    events = phrase(range(60, 70), 0, 0.01)
+    player = Player(out, latency=10)
+    player.play(events)
+    assert not wait_done().cancelled
+    player.close()
+    assert [len(b) for b in out.batches] == [4, 4, 4, 4, 4]
+
+
+def test_latency_cancel_turns_written_notes_off(out):
+    player = Player(out, latency=10)
+    player.play([NoteOn(60, 100, 0), NoteOff(60, 5)])
+    wait_for(lambda: out.count == 1)
+    player.cancel()
+    assert wait_done().cancelled
+    player.close()
+
+    assert sent(out) == [(0x90, 60), (0x80, 60), (0x80, 60)]
+    # One note off right away and one timestamped with the last note we
+    # wrote in case PortMidi hadn't got to it yet.
+    assert out.batches[-1] == [[[0x80, 60, 0], out.batches[0][-1][1]]]
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from eartraining.progress import Progress
+from eartraining.progress import open_progress
+from eartraining.progressive import FixedQuiz
+from eartraining.progressive import PlusMinusProgressiveQuiz
+from eartraining.progressive import ProgressiveQuiz
+
+
+@dataclass
+class Choice:
+
+    idx: int
+
+    def align(self, other):
+        return other
+
+
+@dataclass
+class Template:
+
+    label: str
+
+    def instantiate(self, idx):
+        return Choice(idx)
+
+
+def templates(labels="abcdef"):
+    return [Template(label) for label in labels]
+
+
+def no_args():
+    while True:
+        yield ()
+
+
+quizzes = [
+    lambda: FixedQuiz(templates(), no_args()),
+    lambda: ProgressiveQuiz(templates(), no_args(), 2),
+    lambda: PlusMinusProgressiveQuiz(templates(), no_args(), 2),
+]
+
+
+def session(quiz, progress, answers, rng):
+    "Answer like QuizUI does, stopping after some answers, maybe mid-question."
+    question, choices = quiz.make_questions(quiz.make_choices())
+    for _ in range(answers):
+        choice = question if rng.random() < 0.6 else rng.choice(choices)
+        quiz.update(choice, question)
+        progress.record(question.idx, choice.idx, 0.5)
+        if choice.idx == question.idx:
+            question, choices = quiz.make_questions(quiz.make_choices())
+
+
+@pytest.mark.parametrize("make_quiz", quizzes)
+@pytest.mark.parametrize("snapshot_every", [1, 3, 100])
+def test_reopening_matches_full_replay(tmp_path, make_quiz, snapshot_every):
+    rng = random.Random(snapshot_every)
+    # The quizzes pick questions with the random module.
+    random.seed(snapshot_every)
+    path = tmp_path / "progress.sqlite"
+    with contextlib.redirect_stdout(io.StringIO()):
+        for answers in (7, 7, 7, 12, 1):
+            quiz = make_quiz()
+            progress = Progress(path, "quiz", snapshot_every)
+            progress.load(quiz)
+            session(quiz, progress, answers, rng)
+            progress.close()
+
+        reloaded = make_quiz()
+        progress = Progress(path, "quiz", snapshot_every)
+        progress.load(reloaded)
+        assert len(progress.answers()) == 34
+
+        # Without snapshots every answer is replayed.
+        with progress.db:
+            progress.db.execute("delete from snapshots")
+        replayed = make_quiz()
+        progress.load(replayed)
+        progress.close()
+
+    assert reloaded.state() == replayed.state()
+
+
+def test_replay_is_quiet(tmp_path, capsys):
+    quiz = quizzes[2]()
+    quiz.replay([(0, 0), (1, 0), (1, 1)] * 10)
+    assert capsys.readouterr().out == ""
+
+
+def test_quizzes_with_different_questions_keep_separate_progress(tmp_path):
+    path = tmp_path / "progress.sqlite"
+    rng = random.Random(0)
+    random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        quiz = FixedQuiz(templates("abc"), no_args())
+        progress = open_progress("Chords", quiz, path)
+        session(quiz, progress, 10, rng)
+        progress.close()
+
+        other = FixedQuiz(templates("xyz"), no_args())
+        progress = open_progress("Chords", other, path)
+        assert progress.answers() == []
+        progress.close()
+
+        again = FixedQuiz(templates("abc"), no_args())
+        progress = open_progress("Chords", again, path)
+        assert len(progress.answers()) == 10
+        progress.close()
+    assert again.right == quiz.right
+
+
+def test_snapshots_for_other_questions_are_refused(tmp_path):
+    path = tmp_path / "progress.sqlite"
+    with contextlib.redirect_stdout(io.StringIO()):
+        quiz = FixedQuiz(templates("abc"), no_args())
+        progress = Progress(path, "quiz", 1)
+        progress.load(quiz)
+        session(quiz, progress, 10, random.Random(0))
+        progress.close()
+
+        progress = Progress(path, "quiz", 1)
+        with pytest.raises(ValueError):
+            progress.load(FixedQuiz(templates("xyz"), no_args()))
+        progress.close()
@@ -0,0 +1,53 @@
+import math
+import random
+
+from eartraining.rope import Rope
+from eartraining.rope import leaf_size
+
+
+def assert_balanced(rope):
+    """
+    Every node is balanced and leaves are no bigger than leaf_size.
+    Returns the number of leaves.
+    """
+    leaves = 0
+    stack = [rope]
+    while stack:
+        node = stack.pop()
+        if node.left is None:
+            assert len(node.items) <= leaf_size
+            leaves += 1
+        else:
+            assert abs(node.left.height - node.right.height) <= 1
+            assert node.height == 1 + max(node.left.height, node.right.height)
+            assert node.length == node.left.length + node.right.length
+            stack += [node.left, node.right]
+    return leaves
+
+
+def test_random_joins_keep_order_and_balance():
+    rng = random.Random(2)
+    ropes = [Rope.of(range(i * 100, i * 100 + rng.randrange(100))) for i in range(50)]
+    lists = [list(r) for r in ropes]
+    while len(ropes) > 1:
+        i = rng.randrange(len(ropes) - 1)
+        ropes[i : i + 2] = [ropes[i] + ropes[i + 1]]
+        lists[i : i + 2] = [lists[i] + lists[i + 1]]
+        assert_balanced(ropes[i])
+    assert list(ropes[0]) == lists[0]
+
+
+def test_appending_tops_up_leaves():
+    rope = Rope()
+    for i in range(10000):
+        rope = rope.append(i)
+    assert list(rope) == list(range(10000))
+    assert assert_balanced(rope) == math.ceil(10000 / leaf_size)
+    assert rope.height <= 1.45 * math.log2(10000 / leaf_size) + 1
+
+
+def test_repeat():
+    rope = Rope.of("abc") * 1000 + "d"
+    assert list(rope) == list("abc" * 1000 + "d")
+    assert_balanced(rope)
+    assert rope == list("abc" * 1000 + "d")
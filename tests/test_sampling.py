@@ -0,0 +1,62 @@
+import math
+import random
+
+from eartraining.sampling import WeightTree
+
+
+def assert_total_matches(tree):
+    assert math.isclose(tree.total(), sum(tree.weights), rel_tol=1e-9)
+
+
+def test_total_follows_weights_across_wide_ranges():
+    rng = random.Random(1)
+    tree = WeightTree([1.0] * 50)
+    for _ in range(20000):
+        # Swap weights between tiny and huge, the way the age
+        # weighting in SetQuestionScheduler does.
+        tree[rng.randrange(len(tree))] = rng.choice((1e-30, 1.0, 1e30)) * rng.random()
+        assert tree.total() >= 0
+    assert_total_matches(tree)
+
+    for i in range(len(tree)):
+        tree[i] = rng.random()
+    assert_total_matches(tree)
+
+
+def test_append_grows_tree():
+    tree = WeightTree()
+    for w in range(1, 100):
+        assert tree.append(float(w)) == w - 1
+    assert len(tree) == 99
+    assert tree.total() == sum(range(1, 100))
+
+
+def test_find_matches_running_total():
+    tree = WeightTree([1.0, 0.0, 2.0, 3.0, 0.5])
+    assert tree.find(0.0) == 0
+    assert tree.find(0.999) == 0
+    assert tree.find(1.0) == 2
+    assert tree.find(2.999) == 2
+    assert tree.find(3.0) == 3
+    assert tree.find(6.2) == 4
+
+
+def test_draws_follow_weights_over_a_long_run():
+    rng = random.Random(2)
+    tree = WeightTree([1.0] * 8)
+    # Churn through extreme weights first, then settle on known ones.
+    for _ in range(5000):
+        tree[rng.randrange(8)] = 10.0 ** rng.uniform(-40, 40)
+    weights = [1.0, 2.0, 3.0, 4.0, 0.0, 5.0, 6.0, 3.0]
+    for i, w in enumerate(weights):
+        tree[i] = w
+    assert_total_matches(tree)
+
+    draws = 200000
+    counts = [0] * len(weights)
+    for _ in range(draws):
+        counts[tree.sample(rng)] += 1
+    total = sum(weights)
+    for count, w in zip(counts, weights):
+        expected = draws * w / total
+        assert abs(count - expected) <= 5 * math.sqrt(expected) + 1
@@ -0,0 +1,89 @@
+from functools import reduce
+
+from eartraining.pcsets import mask
+from eartraining.scales import catalog
+from eartraining.scales import popcount
+
+
+def old_scales():
+    "The scales printed by the original scales.py script, in its order."
+    can_follow = {1: (2, 3), 2: (1, 2), 3: (1,)}
+
+    def patterns(so_far):
+        next = can_follow[so_far[-1]] if so_far else (1, 2, 3)
+        for s in next:
+            total = sum(so_far) + s
+            if total == 12 and so_far[0] in can_follow[s]:
+                yield so_far
+            elif total < 12:
+                yield from patterns(so_far + [s])
+
+    for p in patterns([]):
+        yield reduce(lambda notes, step: notes + (notes[-1] + step,), p, (0,))
+
+
+def test_matches_old_script():
+    old = list(old_scales())
+    assert len(catalog) == len(old)
+    assert [s.notes for s in catalog] == old
+    assert [s.mask for s in catalog] == [mask(s) for s in old]
+
+
+def test_named():
+    dorian = catalog.named("Dorian")
+    assert dorian.notes == (0, 2, 3, 5, 7, 9, 10)
+    assert (dorian.family, dorian.mode) == ("Major", 2)
+    assert catalog.named("Whole tone").notes == (0, 2, 4, 6, 8, 10)
+    assert catalog.get((0, 2, 4, 5, 7, 9, 11)).name == "Ionian"
+
+
+def test_containing():
+    major_triad = (0, 4, 7)
+    found = catalog.containing(major_triad)
+    assert found
+    assert catalog.named("Lydian") in found
+    assert catalog.named("Aeolian") not in found
+    for s in found:
+        assert set(major_triad) <= set(s.notes)
+    assert len(found) == sum(set(major_triad) <= set(s.notes) for s in catalog)
+
+
+def test_modes():
+    ionian = catalog.named("Ionian")
+    modes = catalog.modes(ionian)
+    assert [s.name for s in modes] == [
+        "Ionian",
+        "Dorian",
+        "Phrygian",
+        "Lydian",
+        "Mixolydian",
+        "Aeolian",
+        "Locrian",
+    ]
+    assert all(catalog.are_modes(ionian, s) for s in modes)
+    assert catalog.are_modes(modes[3], ionian)
+    assert not catalog.are_modes(ionian, catalog.named("Melodic minor"))
+    # Symmetric scales have fewer distinct modes than notes.
+    whole_tone = catalog.named("Whole tone")
+    assert set(catalog.modes(whole_tone)) == {whole_tone}
+
+
+def test_nearest():
+    mixolydian = (0, 2, 4, 5, 7, 9, 10)
+    found = catalog.nearest(mixolydian, n=3)
+    assert found[0] == (0, catalog.named("Mixolydian"))
+    distances = [d for d, _ in found]
+    assert distances == sorted(distances)
+    for d, s in found:
+        assert d == len(set(mixolydian) ^ set(s.notes))
+    # Nothing left out is closer than the farthest one returned.
+    returned = {s for _, s in found}
+    for s in catalog:
+        if s not in returned:
+            assert len(set(mixolydian) ^ set(s.notes)) >= distances[-1]
+    assert len(catalog.nearest(mixolydian, n=len(catalog) + 5)) == len(catalog)
+
+
+def test_popcount():
+    masks = [0, 1, 0b1011, (1 << 62) - 1]
+    assert list(popcount(masks)) == [0, 1, 3, 62]
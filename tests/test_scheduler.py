@@ -0,0 +1,139 @@
+import contextlib
+import io
+import math
+import random
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from eartraining.scheduler import SetQuestionScheduler
+from eartraining.scheduler import SpacedRepetitionScheduler
+from eartraining.scheduler import day
+
+
+@dataclass(frozen=True)
+class Q:
+
+    label: str
+
+    def options(self, questions):
+        return list(questions)
+
+
+def set_scheduler(sets=20, size=2, **params):
+    params = {"score_decay": 0.8, "age_weighting": 1.1, "correct_required": 3} | params
+    question_sets = [[Q(f"{i}-{j}") for j in range(size)] for i in range(sets)]
+    return SetQuestionScheduler(question_sets, **params)
+
+
+def true_weights(s):
+    n = len(s.pool)
+    age = s.questions_asked - s.last_asked[:n]
+    return (s.limit - s.scores[:n]) * s.age_weighting ** age.astype("f8")
+
+
+def run(s, draws, rng, right=0.7):
+    drawn = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(draws):
+            q = s.draw()
+            drawn.append(q)
+            s.update(q if rng.random() < right else rng.choice(s.pool), q)
+    return drawn
+
+
+def test_weights_stay_in_step_with_true_weights():
+    for seed in range(5):
+        rng = random.Random(seed)
+        random.seed(seed)
+        s = set_scheduler()
+        drawn = run(s, 3000, rng)
+
+        stored = np.array(s.weights.weights)
+        assert math.isclose(s.weights.total(), stored.sum(), rel_tol=1e-9)
+        true = true_weights(s)
+        assert np.allclose(stored / stored.sum(), true / true.sum(), atol=1e-12)
+
+        # No one question takes over.
+        assert len(set(drawn[-200:])) > 1
+
+
+def test_below_count_matches_scores():
+    rng = random.Random(3)
+    random.seed(3)
+    s = set_scheduler(age_weighting=1.5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(2000):
+            epoch = s.epoch
+            q = s.draw()
+            s.update(q if rng.random() < 0.8 else rng.choice(s.pool), q)
+            n = len(s.pool)
+            assert s.below == np.count_nonzero(s.scores[:n] <= s.threshold)
+            if s.epoch != epoch:
+                stored = np.array(s.weights.weights)
+                assert np.allclose(stored, s.stored_weights())
+
+
+def test_long_runs_of_new_questions_stay_finite():
+    random.seed(0)
+    s = set_scheduler(sets=5, size=200, age_weighting=1.05)
+    run(s, 20000, random.Random(0), right=1.0)
+    assert math.isfinite(s.weights.total())
+
+
+def test_score_many_matches_sequential_updates():
+    rng = random.Random(5)
+    batch, one_by_one = set_scheduler(), set_scheduler()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for s in (batch, one_by_one):
+            s.add_questions_until(20)
+    pool = one_by_one.pool
+    answers = [(rng.choice(pool), rng.choice(pool)) for _ in range(500)]
+    answers += [(q, q) for q in rng.choices(pool, k=500)]
+    rng.shuffle(answers)
+
+    batch.update_many(answers)
+    for got, expected in answers:
+        one_by_one.update(got, expected)
+
+    n = len(pool)
+    assert np.allclose(batch.scores[:n], one_by_one.scores[:n])
+    assert batch.below == one_by_one.below
+    assert np.allclose(batch.weights.weights, one_by_one.weights.weights)
+
+
+def test_spaced_repetition_needs_questions():
+    with pytest.raises(ValueError):
+        SpacedRepetitionScheduler([])
+
+
+def test_spaced_repetition_intervals():
+    now = [0.0]
+    s = SpacedRepetitionScheduler(
+        [Q("a"), Q("b")], intervals=(day, 6 * day), clock=lambda: now[0]
+    )
+    a = s.draw()
+    b = s.add_next_question()
+    card = s.cards[s.index[a]]
+
+    # The first right answers use the fixed intervals and then each one
+    # multiplies the interval by the ease, which a quality 4 answer
+    # leaves alone.
+    for interval in (day, 6 * day, 15 * day, 37.5 * day):
+        s.update(a, a)
+        assert card.interval == interval
+        assert card.due == now[0] + interval
+        assert card.ease == 2.5
+        now[0] = card.due
+
+    # A wrong answer brings it back soon and makes it harder.
+    s.update(b, a)
+    assert card.interval == s.lapse_interval
+    assert card.repetitions == 0
+    assert card.ease == pytest.approx(1.96)
+    now[0] = card.due
+    assert s.draw() == a
+    s.update(a, a)
+    assert card.interval == day
+    assert card.ease == pytest.approx(1.96)
@@ -0,0 +1,18 @@
+from eartraining.simulate import grids
+from eartraining.simulate import simulate
+
+
+def test_set_grid_reaches_mastery():
+    # Every point in the grid, including the strongest age weighting,
+    # should get learners to mastery. A broken sampler that sticks on
+    # one question never does.
+    for params in grids["set"]:
+        for seed in range(3):
+            mastered, _, _ = simulate("set", params, 12, seed, 0.9, 5000)
+            assert mastered is not None, params
+
+
+def test_srs_reaches_mastery():
+    for params in grids["srs"]:
+        mastered, _, _ = simulate("srs", params, 12, 0, 0.9, 5000)
+        assert mastered is not None, params
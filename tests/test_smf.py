@@ -0,0 +1,76 @@
+import pytest
+
+from eartraining import smf
+from eartraining.midi import Note
+from eartraining.midi import NoteOff
+from eartraining.midi import NoteOn
+from eartraining.midi import Parallel
+from eartraining.midi import Rest
+from eartraining.midi import Sequence
+from eartraining.tempo import TempoMap
+
+
+def melody():
+    return Sequence(
+        [
+            Note(0, 1 / 4),
+            Rest(1 / 8),
+            Parallel([Note(0, 3 / 8), Note(4, 3 / 8), Note(7, 3 / 8)]),
+            Note(12, 1 / 16, velocity=100),
+            Note(11, 3 / 16, channel=1),
+        ]
+    )
+
+
+def assert_same_events(got, expected):
+    got, expected = list(got), list(expected)
+    assert [(type(e), e.note, e.channel) for e in got] == [
+        (type(e), e.note, e.channel) for e in expected
+    ]
+    assert [getattr(e, "velocity", 0) for e in got] == [
+        getattr(e, "velocity", 0) for e in expected
+    ]
+    # The tempo is stored in whole microseconds per quarter note.
+    assert [e.time for e in got] == pytest.approx([e.time for e in expected], abs=1e-5)
+
+
+@pytest.mark.parametrize("format", [0, 1])
+def test_round_trip(tmp_path, format):
+    path = tmp_path / "out.mid"
+    events = melody().render(60, 90).sorted()
+    smf.write(path, events, 90, format=format, programs={0: 1, 1: 40})
+    assert_same_events(smf.read_events(path), events)
+
+
+def test_out_of_order_events_are_rejected(tmp_path):
+    events = [NoteOn(60, 80, 1.0), NoteOff(60, 0.5)]
+    with pytest.raises(ValueError):
+        smf.write(tmp_path / "out.mid", events, 120)
+
+
+def test_varlen():
+    assert smf.varlen(0) == b"\x00"
+    assert smf.varlen(0x80) == b"\x81\x00"
+    assert smf.varlen(0x0FFFFFFF) == b"\xff\xff\xff\x7f"
+    with pytest.raises(ValueError):
+        smf.varlen(-1)
+
+
+@pytest.mark.parametrize("format", [0, 1])
+def test_tempo_changes_round_trip(tmp_path, format):
+    path = tmp_path / "out.mid"
+    tempo = [(0, 120), (1 / 2, 90), (3 / 4, 150)]
+    smf.write_playable(path, melody(), 60, tempo, format=format)
+    assert_same_events(smf.read_events(path), melody().render(60, tempo).sorted())
+
+    _, changes = smf.read(path)
+    assert [position for position, _ in changes] == [0, 1 / 2, 3 / 4]
+    assert [bpm for _, bpm in changes] == pytest.approx([120, 90, 150])
+
+
+def test_write_accepts_tempo_map(tmp_path):
+    path = tmp_path / "out.mid"
+    tempo = TempoMap.of([(0, 120), (4, 90)])
+    events = melody().render(60, tempo).sorted()
+    smf.write(path, events, tempo)
+    assert_same_events(smf.read_events(path), events)
@@ -0,0 +1,82 @@
+import wave
+
+import numpy as np
+import pytest
+
+from eartraining import synth
+from eartraining.midi import Note
+from eartraining.midi import Parallel
+from eartraining.midi import Rest
+from eartraining.midi import Sequence
+
+
+def phrase():
+    return Sequence(
+        [
+            Note(0, 1 / 4),
+            Rest(1 / 8),
+            Parallel([Note(4, 1 / 8, 90), Note(7, 1 / 4, channel=1)]),
+            Note(0, 1 / 8),
+        ]
+    )
+
+
+# Every 1000th sample of phrase() at root 60 and 120 bpm, at 8 kHz.
+golden_samples = [
+    0.0,
+    -0.394725,
+    0.176453,
+    0.396908,
+    -0.475073,
+    0.000659,
+    0.0,
+    0.882433,
+    0.344176,
+    0.002319,
+    0.196848,
+    -0.303551,
+    0.176453,
+    0.198454,
+    0.0,
+]
+
+golden_frames = [
+    0,
+    -5790,
+    2588,
+    5822,
+    -6969,
+    9,
+    0,
+    12945,
+    5049,
+    34,
+    2887,
+    -4453,
+    2588,
+    2911,
+    0,
+]
+
+
+def test_synthesize_golden():
+    samples = synth.synthesize(phrase().render(60, 120), rate=8000)
+    assert len(samples) == 14001
+    assert samples[::1000] == pytest.approx(golden_samples, abs=1e-6)
+
+
+def test_events_and_event_arrays_sound_the_same():
+    events = phrase().render(60, 120)
+    assert np.array_equal(
+        synth.synthesize(events, rate=8000), synth.synthesize(list(events), rate=8000)
+    )
+
+
+def test_render_wav_golden(tmp_path):
+    path = str(tmp_path / "out.wav")
+    synth.render_wav(path, phrase().render(60, 120), rate=8000)
+    with wave.open(path) as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, 8000)
+        frames = np.frombuffer(w.readframes(w.getnframes()), "<i2")
+    assert len(frames) == 14001
+    assert np.abs(frames[::1000] - golden_frames).max() <= 1
@@ -0,0 +1,65 @@
+import gc
+import weakref
+
+from eartraining import timing
+from eartraining.backends import NullOutput
+from eartraining.backends import RecordingOutput
+from eartraining.midi import NoteOff
+from eartraining.midi import NoteOn
+
+
+def test_emissions_only_when_asked_for():
+    events = [NoteOn(60, 100, 0.0), NoteOff(60, 0.01)]
+    timing.jitter.clear()
+    assert timing.play(NullOutput(), events) is None
+    assert len(timing.jitter.lateness()) == 2
+
+    emissions = timing.play(NullOutput(), events, emissions=True)
+    assert [e.requested for e in emissions] == [0.0, 0.01]
+    assert all(e.lateness >= 0 for e in emissions)
+
+
+def test_jitter_log_is_bounded():
+    log = timing.JitterLog(size=8)
+    for i in range(100):
+        log.record(i, i + 0.001)
+    assert len(log.lateness()) == 8
+    assert log.count == 100
+
+
+class Cycle:
+    def __init__(self):
+        self.me = self
+
+
+class Garbage(NoteOn):
+
+    "A note on that leaves a reference cycle behind when played."
+
+    def emit(self, midi_out):
+        super().emit(midi_out)
+        cycle = Cycle()
+        self.created.append(weakref.ref(cycle))
+
+
+def test_garbage_is_collected_between_events():
+    created = []
+    alive = []
+    events = []
+    for i in range(5):
+        e = Garbage(60, 100, i * 0.03)
+        e.created = created
+        events.append(e)
+        events.append(NoteOff(60, i * 0.03 + 0.001))
+
+    class Check(NoteOn):
+        def emit(self, midi_out):
+            alive.append(sum(ref() is not None for ref in created))
+
+    events.append(Check(60, 100, 0.2))
+    gc.collect()
+    out = RecordingOutput()
+    timing.play(out, events)
+    assert gc.isenabled()
+    assert alive == [0]
+    assert out.count == 10